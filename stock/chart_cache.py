@@ -0,0 +1,94 @@
+import hashlib
+import os
+from typing import TYPE_CHECKING, Iterable, Optional
+
+from quote_cache import cache_dir
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DEFAULT_MAX_FILES = 200  # 图表目录最多保留的文件数
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024  # 图表目录最大占用空间
+
+
+def data_fingerprint(data: 'pd.DataFrame') -> str:
+    """数据内容指纹：索引与各列的值相同则指纹相同"""
+    import pandas as pd
+
+    hashed = pd.util.hash_pandas_object(data, index=True).to_numpy()
+    digest = hashlib.sha1(hashed.tobytes())
+    digest.update(','.join(map(str, data.columns)).encode())
+    return digest.hexdigest()
+
+
+class ChartCache:
+    """按内容寻址的图表文件缓存：相同(代码, 数据, 图表类型, 尺寸)直接复用已有文件，超出容量时按最近使用淘汰"""
+
+    def __init__(self, directory: Optional[str] = None, max_files: int = DEFAULT_MAX_FILES,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory or os.path.join(cache_dir(), 'charts')
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def key(code: str, data: 'pd.DataFrame', chart_type: str, size: Iterable, extra: Iterable = ()) -> str:
+        """图表缓存键，extra为影响图表内容的其他参数（如标题中的名称、昨收价）"""
+        parts = [code, data_fingerprint(data), chart_type, 'x'.join(map(str, size))] + [str(item) for item in extra]
+        return hashlib.sha1('|'.join(parts).encode()).hexdigest()[:20]
+
+    def path(self, key: str, chart_type: str = 'chart') -> str:
+        return os.path.join(self.directory, f'{chart_type}_{key}.png')
+
+    def get(self, key: str, chart_type: str = 'chart') -> Optional[str]:
+        """命中时返回文件路径并刷新其访问时间，未命中返回None"""
+        path = self.path(key, chart_type)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def temp_path(self, key: str) -> str:
+        """渲染时写入的临时文件，完成后调用commit"""
+        return os.path.join(self.directory, f'.{key}.{os.getpid()}.tmp.png')
+
+    def commit(self, key: str, temp_path: str, chart_type: str = 'chart') -> str:
+        """将渲染完成的临时文件放入缓存，并按容量淘汰旧文件"""
+        path = self.path(key, chart_type)
+        os.replace(temp_path, path)
+        self.evict(keep=path)
+        return path
+
+    def put(self, key: str, data: bytes, chart_type: str = 'chart') -> str:
+        """写入内存中渲染好的图片数据，返回缓存文件路径"""
+        temp_path = self.temp_path(key)
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        return self.commit(key, temp_path, chart_type)
+
+    def evict(self, keep: Optional[str] = None):
+        """文件数或总大小超限时，按最近使用时间从旧到新删除"""
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.is_file() and entry.name.endswith('.png') and not entry.name.startswith('.'):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            return
+
+        total = sum(size for _, size, _ in entries)
+        count = len(entries)
+        for _, size, path in sorted(entries):
+            if count <= self.max_files and total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            count -= 1
+            total -= size
@@ -0,0 +1,48 @@
+import base64
+import io
+from typing import IO, NamedTuple, Optional
+
+
+class PngOptions(NamedTuple):
+    """PNG输出参数：dpi、zlib压缩级别(0-9)、调色板颜色数(None为不量化)"""
+    dpi: int = 100
+    compress_level: int = 6
+    colors: Optional[int] = None
+
+    def tag(self) -> str:
+        """参与缓存键的标识，不同输出参数的图片分别缓存"""
+        return f'{self.dpi}-{self.compress_level}-{self.colors or 0}'
+
+
+DEFAULT_PNG = PngOptions()
+# 嵌入式预览用的小图：低dpi、最高压缩、64色调色板
+PREVIEW_PNG = PngOptions(dpi=50, compress_level=9, colors=64)
+
+# 每次编码的原始字节数，取3的倍数使分块编码结果可直接拼接
+BASE64_CHUNK = 3 * 64 * 1024
+
+
+def figure_png(fig, options: PngOptions = DEFAULT_PNG, **savefig_kwargs) -> bytes:
+    """把matplotlib图表编码为内存中的PNG数据，不经过磁盘"""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=options.dpi,
+                pil_kwargs={'compress_level': options.compress_level}, **savefig_kwargs)
+    if not options.colors:
+        return buffer.getvalue()
+
+    # 量化为调色板图像，颜色较少的行情图体积通常可缩小一半以上
+    from PIL import Image
+
+    buffer.seek(0)
+    with Image.open(buffer) as image:
+        quantized = image.convert('RGB').quantize(colors=options.colors)
+    output = io.BytesIO()
+    quantized.save(output, format='PNG', compress_level=options.compress_level)
+    return output.getvalue()
+
+
+def stream_base64(data: bytes, out: IO[str], chunk_size: int = BASE64_CHUNK):
+    """分块把数据以Base64写入文本流，不在内存中生成完整的编码字符串"""
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        out.write(base64.b64encode(view[start:start + chunk_size]).decode('ascii'))
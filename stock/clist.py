@@ -0,0 +1,56 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, Optional
+
+from http_client import HttpClient, get_http_client
+
+CLIST_URL = 'http://push2.eastmoney.com/api/qt/clist/get'
+
+
+def _fetch_page(http: HttpClient, fs: str, fields: str, page: int, page_size: int,
+                headers: Optional[Dict] = None) -> Dict:
+    """请求clist的一页，返回 {'total': 总数, 'diff': [...]}"""
+    params = {
+        'pn': page,
+        'pz': page_size,
+        'po': 1,
+        'np': 1,
+        'ut': 'bd1d9ddb04089700cf9c27f6f7426281',
+        'fltt': 2,
+        'invt': 2,
+        'fid': 'f12',
+        'fs': fs,
+        'fields': fields
+    }
+    response = http.get(CLIST_URL, params=params, headers=headers)
+    data = response.json().get('data') or {}
+    diff = data.get('diff') or []
+    if isinstance(diff, dict):  # np=0时diff为以序号为键的字典
+        diff = list(diff.values())
+    return {'total': int(data.get('total') or 0), 'diff': diff}
+
+
+def iter_clist(fs: str, fields: str, page_size: int = 100, http: Optional[HttpClient] = None,
+               headers: Optional[Dict] = None, max_workers: int = 4) -> Iterator[Dict]:
+    """遍历clist列表：首页获取总数后并发拉取其余页，按页完成顺序逐条产出"""
+    http = http or get_http_client()
+    first = _fetch_page(http, fs, fields, 1, page_size, headers)
+    yield from first['diff']
+
+    if not first['diff'] or len(first['diff']) >= first['total']:
+        return
+    # 服务端可能限制单页条数，以首页实际返回条数作为页大小
+    page_size = min(page_size, len(first['diff']))
+    pages = -(-first['total'] // page_size)  # 向上取整
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(_fetch_page, http, fs, fields, page, page_size, headers)
+            for page in range(2, pages + 1)
+        ]
+        try:
+            for future in as_completed(futures):
+                yield from future.result()['diff']
+        finally:
+            # 调用方提前停止遍历或出错时取消未开始的请求
+            for future in futures:
+                future.cancel()
@@ -0,0 +1,62 @@
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+# 多日分时绘图时最多保留的点数；单日分时（A股240点、港股约330点）不做降采样
+MAX_PLOT_POINTS = 300
+
+
+def lttb_indices(x: 'np.ndarray', y: 'np.ndarray', threshold: int) -> 'np.ndarray':
+    """Largest-Triangle-Three-Buckets降采样，返回保留点的下标（含首尾，递增）
+
+    除首尾外的点均分为threshold-2个桶，每个桶选出与上一个选中点、下一个桶均值点
+    构成三角形面积最大的点，从而保留走势的峰谷形状
+    """
+    import numpy as np
+
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    # 第i个桶为 [edges[i], edges[i+1])，最后一个边界为末点
+    edges = (np.arange(threshold - 1) * ((n - 2) / (threshold - 2))).astype(np.intp) + 1
+    edges[-1] = n - 1
+    # 各桶均值一次算出；最后一个桶的"下一个桶"是末点本身
+    counts = np.diff(np.append(edges, n))
+    mean_x = np.add.reduceat(x, edges) / counts
+    mean_y = np.add.reduceat(y, edges) / counts
+
+    selected = np.empty(threshold, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        bucket_x, bucket_y = x[start:end], y[start:end]
+        area = np.abs((x[a] - mean_x[i + 1]) * (bucket_y - y[a]) - (x[a] - bucket_x) * (mean_y[i + 1] - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample_frame(data: 'pd.DataFrame', threshold: int = MAX_PLOT_POINTS, column: str = 'price',
+                     sum_columns: Iterable[str] = ('volume', 'amount')) -> 'pd.DataFrame':
+    """按column的LTTB结果选取行；sum_columns按上一个选中点之后到当前点的区间求和，使成交量总量不变
+
+    横轴按序号计算，隔夜与午休的空档不影响选点
+    """
+    import numpy as np
+
+    if len(data) <= threshold:
+        return data
+
+    indices = lttb_indices(np.arange(len(data)), data[column].to_numpy(dtype='float64'), threshold)
+    result = data.iloc[indices].copy()
+    starts = np.concatenate([[0], indices[:-1] + 1])
+    for name in sum_columns:
+        if name in data.columns:
+            result[name] = np.add.reduceat(data[name].to_numpy(dtype='float64'), starts)
+    return result
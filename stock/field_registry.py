@@ -0,0 +1,114 @@
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class Field(NamedTuple):
+    """接口字段定义：fNN -> 名称、类型、换算系数"""
+    key: str
+    name: str
+    dtype: type = float
+    scale: float = 1.0  # 接口值乘以该系数得到对外单位
+    label: str = ''
+
+
+class FieldRegistry:
+    """某一类东方财富接口的字段表，按名称投影请求字段并统一换算单位"""
+
+    def __init__(self, fields: Iterable[Field]):
+        self.fields = {field.name: field for field in fields}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.fields
+
+    def keys(self, names: Iterable[str]) -> str:
+        """名称列表对应的fields请求参数，去重并保持顺序"""
+        return ','.join(dict.fromkeys(self.fields[name].key for name in names))
+
+    def convert(self, field: Field, value):
+        """单个接口值转换为对外类型与单位，停牌等情况返回的'-'视为缺失"""
+        if field.dtype is str:
+            return '' if value is None else str(value)
+        try:
+            return field.dtype(float(value) * field.scale)
+        except (TypeError, ValueError):
+            return field.dtype(0)
+
+    def parse(self, row: Dict, names: Iterable[str], fill_missing: bool = True) -> Dict:
+        """从一行接口数据中取出指定名称的字段；fill_missing=False时跳过行中不存在的字段"""
+        result = {}
+        for name in names:
+            field = self.fields[name]
+            if field.key in row or fill_missing:
+                result[name] = self.convert(field, row.get(field.key))
+        return result
+
+    def frame(self, rows: List[Dict], names: Iterable[str]) -> 'pd.DataFrame':
+        """批量数据整体转换为DataFrame，数值列向量化换算，缺失值为NaN"""
+        import pandas as pd
+
+        names = list(names)
+        df = pd.DataFrame(rows, columns=[self.fields[name].key for name in names])
+        df.columns = names
+        for name in names:
+            field = self.fields[name]
+            if field.dtype is str:
+                df[name] = df[name].fillna('').astype(str)
+            else:
+                df[name] = pd.to_numeric(df[name], errors='coerce') * field.scale
+        return df
+
+
+# push2 stock/get 单只证券详情（fltt=2）
+STOCK_GET_FIELDS = FieldRegistry([
+    Field('f57', 'code', str, label='代码'),
+    Field('f58', 'name', str, label='名称'),
+    Field('f43', 'price', label='最新价(元)'),
+    Field('f169', 'change', label='涨跌额(元)'),
+    Field('f170', 'change_percent', label='涨跌幅(%)'),
+    Field('f46', 'open', label='今开(元)'),
+    Field('f44', 'high', label='最高(元)'),
+    Field('f45', 'low', label='最低(元)'),
+    Field('f60', 'pre_close', label='昨收(元)'),
+    Field('f47', 'volume', scale=1e-4, label='成交量(万手)'),
+    Field('f48', 'amount', scale=1e-4, label='成交额(万元)'),
+    Field('f168', 'turnover_rate', label='换手率(%)'),
+    Field('f50', 'volume_ratio', label='量比'),
+    Field('f191', 'commission_ratio', label='委比(%)'),
+    Field('f162', 'pe_ratio', label='市盈率(动)'),
+    Field('f167', 'pb_ratio', label='市净率'),
+    Field('f116', 'market_value', scale=1e-8, label='总市值(亿)'),
+    Field('f117', 'float_market_value', scale=1e-8, label='流通市值(亿)'),
+    Field('f71', 'estimate_nav', label='实时估值(元)'),
+    # 场内基金的换手率在f8返回，部分基金只有f51
+    Field('f8', 'fund_turnover_rate', label='基金换手率(%)'),
+    Field('f51', 'fund_turnover_rate_alt', label='基金换手率(备用,%)'),
+])
+
+# push2 ulist.np/get、clist/get 及 ulist/sse 列表类接口（fltt=2）
+LIST_FIELDS = FieldRegistry([
+    Field('f12', 'code', str, label='代码'),
+    Field('f13', 'market', int, label='市场'),
+    Field('f14', 'name', str, label='名称'),
+    Field('f2', 'price', label='最新价(元)'),
+    Field('f3', 'change_percent', label='涨跌幅(%)'),
+    Field('f4', 'change', label='涨跌额(元)'),
+    Field('f17', 'open', label='今开(元)'),
+    Field('f15', 'high', label='最高(元)'),
+    Field('f16', 'low', label='最低(元)'),
+    Field('f18', 'pre_close', label='昨收(元)'),
+    Field('f5', 'volume', scale=1e-4, label='成交量(万手)'),
+    Field('f6', 'amount', scale=1e-4, label='成交额(万元)'),
+    Field('f8', 'turnover_rate', label='换手率(%)'),
+    Field('f10', 'volume_ratio', label='量比'),
+    Field('f9', 'pe_ratio', label='市盈率(动)'),
+    Field('f23', 'pb_ratio', label='市净率'),
+    Field('f20', 'market_value', scale=1e-8, label='总市值(亿)'),
+    Field('f21', 'float_market_value', scale=1e-8, label='流通市值(亿)'),
+    Field('f124', 'updated_at', int, label='行情更新时间(Unix秒)'),
+])
+
+# 行情查询默认返回的字段
+QUOTE_NAMES = ('name', 'price', 'change_percent', 'pre_close', 'high', 'low',
+               'volume', 'amount', 'turnover_rate', 'market_value')
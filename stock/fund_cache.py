@@ -0,0 +1,49 @@
+import time
+from typing import Dict, Optional
+
+from quote_cache import QuoteCache, get_quote_cache
+from trading_calendar import nav_date
+
+STALE_RETRY = 1800  # 净值尚未更新到生效日期时，隔多久重新请求（秒）
+
+
+class FundDailyCache:
+    """按(基金代码, 净值日)缓存官方净值、名称与申购状态，到下次净值公布时自动失效"""
+
+    def __init__(self, cache: Optional[QuoteCache] = None):
+        self.cache = cache or get_quote_cache()
+
+    @staticmethod
+    def _key(fund_code: str) -> str:
+        return f'fund_daily:{fund_code}:{nav_date()}'
+
+    def get(self, fund_code: str) -> Dict:
+        """读取当前净值日的缓存，无缓存返回空字典"""
+        entry = self.cache.get('fund_daily', self._key(fund_code)) or {}
+        # 净值日期落后于生效日期说明基金还没公布，过一段时间后重新请求
+        if entry.get('jzrq') and entry['jzrq'] < nav_date() and \
+                time.time() - entry.get('nav_fetched_at', 0) > STALE_RETRY:
+            entry = {key: value for key, value in entry.items()
+                     if key not in ('dwjz', 'jzrq', 'nav_fetched_at')}
+        return entry
+
+    def update(self, fund_code: str, **fields):
+        """合并写入当前净值日的缓存"""
+        entry = self.cache.get('fund_daily', self._key(fund_code)) or {}
+        if 'dwjz' in fields:
+            fields['nav_fetched_at'] = time.time()
+        entry.update(fields)
+        self.cache.put('fund_daily', self._key(fund_code), entry)
+
+    def update_from_fundgz(self, fund_code: str, nav_data: Dict):
+        """从天天基金估值接口的返回中提取官方净值与名称"""
+        fields = {}
+        if nav_data.get('name'):
+            fields['name'] = nav_data['name']
+        try:
+            fields['dwjz'] = float(nav_data['dwjz'])
+            fields['jzrq'] = nav_data.get('jzrq', '')
+        except (KeyError, TypeError, ValueError):
+            pass
+        if fields:
+            self.update(fund_code, **fields)
@@ -0,0 +1,157 @@
+import argparse
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+import pandas as pd
+
+from http_client import HttpClient, get_http_client
+from clist import iter_clist
+from fund_cache import FundDailyCache
+from fund_utils import FUND_BOARDS
+from field_registry import LIST_FIELDS
+
+# 场内行情字段，名称见字段注册表
+QUOTE_FIELDS = ('code', 'name', 'price', 'change_percent', 'volume', 'amount', 'turnover_rate', 'market_value')
+
+# 天天基金全市场估值列表，一次请求返回全部基金的估值与最新净值
+GZ_LIST_URL = 'http://api.fund.eastmoney.com/FundGuZhi/GetFundGZList'
+
+OUTPUT_COLUMNS = [
+    'code', 'name', 'kind', 'price', 'change_percent', 'nav', 'nav_source',
+    'premium_rate', 'turnover_rate', 'amount', 'volume', 'market_value'
+]
+
+
+class FundPremiumScanner:
+    """全市场场内基金溢价扫描：批量拉取场内价格与净值/估值，向量化计算溢价率并排序"""
+
+    def __init__(self, http: Optional[HttpClient] = None):
+        self.headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        }
+        self.http = http or get_http_client()
+        # 估值列表缺失的基金用当前净值日的官方净值补齐
+        self.fund_cache = FundDailyCache()
+
+    def fetch_quotes(self, kinds: Tuple[str, ...] = ('lof', 'etf')) -> pd.DataFrame:
+        """clist分页并发拉取场内基金行情，按字段注册表整体换算单位"""
+        rows, row_kinds = [], []
+        for kind in kinds:
+            for item in iter_clist(FUND_BOARDS[kind], LIST_FIELDS.keys(QUOTE_FIELDS), http=self.http, headers=self.headers):
+                rows.append(item)
+                row_kinds.append(kind)
+
+        df = LIST_FIELDS.frame(rows, QUOTE_FIELDS).assign(kind=row_kinds)
+        return df.drop_duplicates('code').set_index('code')
+
+    def fetch_navs(self) -> pd.DataFrame:
+        """一次请求拉取全部基金的实时估值与最新净值，索引为基金代码"""
+        params = {
+            'type': 1,
+            'sort': 3,
+            'orderType': 'desc',
+            'canbuy': 0,
+            'pageIndex': 1,
+            'pageSize': 20000
+        }
+        headers = dict(self.headers, Referer='http://fund.eastmoney.com/')
+        response = self.http.get(GZ_LIST_URL, params=params, headers=headers)
+        items = (response.json().get('Data') or {}).get('list') or []
+
+        df = pd.DataFrame(items, columns=['bzdm', 'gsz', 'dwjz'])
+        df = df.rename(columns={'bzdm': 'code', 'gsz': 'estimate', 'dwjz': 'official'})
+        df['code'] = df['code'].astype(str)
+        df[['estimate', 'official']] = df[['estimate', 'official']].apply(pd.to_numeric, errors='coerce')
+        return df.drop_duplicates('code').set_index('code')
+
+    def scan(self, kinds: Tuple[str, ...] = ('lof', 'etf'), min_amount: float = 0.0,
+             min_turnover: float = 0.0, min_premium: float = 0.0, direction: str = 'both',
+             limit: Optional[int] = None) -> pd.DataFrame:
+        """扫描溢价率，direction为premium/discount/both，按溢价率(或其绝对值)从大到小排序"""
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            quotes_future = executor.submit(self.fetch_quotes, kinds)
+            navs_future = executor.submit(self.fetch_navs)
+            quotes = quotes_future.result()
+            try:
+                navs = navs_future.result()
+            except Exception as e:
+                print(f"获取基金估值列表失败: {str(e)}", file=sys.stderr)
+                navs = pd.DataFrame(columns=['estimate', 'official'], dtype='float64')
+
+        df = quotes.join(navs, how='left')
+        # 优先使用实时估值，其次最新官方净值，最后读取本地净值缓存
+        df['nav'] = df['estimate'].where(df['estimate'] > 0, df['official'].where(df['official'] > 0))
+        df['nav_source'] = 'estimate'
+        df.loc[~(df['estimate'] > 0), 'nav_source'] = 'official'
+        missing = df.index[df['nav'].isna()]
+        if len(missing):
+            cached = pd.Series({code: self.fund_cache.get(code).get('dwjz') for code in missing}, dtype='float64')
+            df.loc[missing, 'nav'] = cached
+            df.loc[missing, 'nav_source'] = 'cache'
+        df.loc[df['nav'].isna(), 'nav_source'] = ''
+
+        df['premium_rate'] = ((df['price'] / df['nav'] - 1) * 100).round(2)
+
+        mask = (
+            df['premium_rate'].notna()
+            & (df['price'] > 0)
+            & (df['amount'].fillna(0) >= min_amount)
+            & (df['turnover_rate'].fillna(0) >= min_turnover)
+        )
+        if direction == 'premium':
+            mask &= df['premium_rate'] >= min_premium
+            order = df['premium_rate']
+        elif direction == 'discount':
+            mask &= df['premium_rate'] <= -min_premium
+            order = -df['premium_rate']
+        else:
+            mask &= df['premium_rate'].abs() >= min_premium
+            order = df['premium_rate'].abs()
+
+        result = df[mask].assign(_order=order[mask]).sort_values('_order', ascending=False)
+        result = result.reset_index()[OUTPUT_COLUMNS]
+        return result.head(limit) if limit else result
+
+
+def write_table(df: pd.DataFrame, fmt: str, out=None):
+    """输出扫描结果：ndjson每行一个JSON对象，csv带表头，table为对齐文本"""
+    out = out or sys.stdout
+    if fmt == 'ndjson':
+        for record in df.to_dict(orient='records'):
+            record = {key: (None if isinstance(value, float) and value != value else value)
+                      for key, value in record.items()}
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+    elif fmt == 'csv':
+        df.to_csv(out, index=False)
+    else:
+        out.write(df.to_string(index=False) + '\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='全市场场内基金溢价扫描')
+    parser.add_argument('--kinds', default='lof,etf', help='基金类型，逗号分隔: lof,etf')
+    parser.add_argument('--min-amount', type=float, default=0.0, help='最低成交额(万元)')
+    parser.add_argument('--min-turnover', type=float, default=0.0, help='最低换手率(%%)')
+    parser.add_argument('--min-premium', type=float, default=0.0, help='最低溢价率绝对值(%%)')
+    parser.add_argument('--direction', choices=('premium', 'discount', 'both'), default='both',
+                        help='只看溢价、只看折价或两者')
+    parser.add_argument('--limit', type=int, default=None, help='最多输出条数')
+    parser.add_argument('--format', choices=('table', 'ndjson', 'csv'), default='table', help='输出格式')
+    args = parser.parse_args(argv)
+
+    kinds = tuple(kind for kind in args.kinds.split(',') if kind)
+    unknown = [kind for kind in kinds if kind not in FUND_BOARDS]
+    if unknown:
+        parser.error(f"未知的基金类型: {','.join(unknown)}")
+
+    df = FundPremiumScanner().scan(
+        kinds, min_amount=args.min_amount, min_turnover=args.min_turnover,
+        min_premium=args.min_premium, direction=args.direction, limit=args.limit
+    )
+    write_table(df, args.format)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,117 +1,290 @@
-import requests
+from http_client import get_http_client
+from quote_cache import get_quote_cache
+from symbol_master import get_symbol_master
+from clist import iter_clist
+from trading_calendar import trading_date
+from fund_cache import FundDailyCache
+from rate_limiter import TokenBucket
+from field_registry import STOCK_GET_FIELDS
+from quote import Quote
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 import json
+import re
+import threading
 import time
-from typing import Dict, Union
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+# 场内基金板块
+FUND_BOARDS = {
+    'lof': 'b:MK0021',  # LOF基金
+    'etf': 'b:MK0022'   # ETF基金
+}
+
+# 页面中的单日申购限额说明，如"单日累计购买上限100.00元"
+PURCHASE_LIMIT_PATTERN = re.compile(r'上限\s*([\d.]+)\s*(万|亿)?元')
+
+# 历史净值行中的净值日期
+NAV_DATE_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+# 各净值来源的单次请求超时（秒）
+NAV_SOURCE_TIMEOUTS = {
+    'fundgz': 1.5,
+    'push2': 1.5,
+    'page': 3.0,
+    'lsjz': 2.0
+}
+
+# 场内基金行情需要的字段，按字段注册表请求与换算
+FUND_INFO_NAMES = ('name', 'price', 'change', 'change_percent', 'fund_turnover_rate',
+                   'fund_turnover_rate_alt', 'market_value', 'estimate_nav')
+
+# 对冲模式下当前来源多久未给出有效结果就启动下一个来源（秒）
+NAV_HEDGE_DELAY = 0.5
 
 class FundUtils:
     def __init__(self):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
-
-    def get_fund_nav(self, fund_code: str) -> float:
-        """获取基金净值，优先获取实时估值"""
+        # 与其他工具类共享连接池
+        self.http = get_http_client()
+        # 跨进程共享的行情缓存
+        self.cache = get_quote_cache()
+        # 证券码表，统一代码到市场的路由
+        self.symbols = get_symbol_master()
+        # 按净值日缓存的基金净值与元数据，与StockUtils共享
+        self.fund_cache = FundDailyCache(self.cache)
+        # 各净值来源的耗时与胜出统计
+        self._nav_stats: Dict[str, Dict[str, float]] = {}
+        self._nav_stats_lock = threading.Lock()
+        # 竞速线程当前登记响应的列表，落选时由主线程关闭
+        self._nav_race = threading.local()
+
+    def _get_secid(self, fund_code: str) -> str:
+        """通过证券码表获取secid，无法识别时按深证处理"""
+        symbol = self.symbols.resolve(fund_code)
+        return symbol['secid'] if symbol else f'0.{fund_code}'
+
+    def _nav_get(self, url: str, timeout: float, **kwargs):
+        """净值来源共用的GET：流式读取响应体，竞速中的请求登记后可被主线程关闭"""
+        response = self.http.get(url, headers=self.headers, timeout=timeout, stream=True, **kwargs)
+        responses = getattr(self._nav_race, 'responses', None)
+        if responses is not None:
+            responses.append(response)
+        return response
+
+    def _nav_from_fundgz(self, fund_code: str, timeout: float) -> float:
+        """天天基金实时估值（这个API对海外ETF更准确）"""
+        url = f'http://fundgz.1234567.com.cn/js/{fund_code}.js'
+        response = self._nav_get(url, timeout)
+        if response.status_code == 200 and len(response.text) > 8:
+            nav_data = json.loads(response.text[8:-2])
+            # 顺带缓存官方净值与名称
+            self.fund_cache.update_from_fundgz(fund_code, nav_data)
+            return float(nav_data.get('gsz', 0))
+        return 0
+
+    def _nav_from_push2(self, fund_code: str, timeout: float) -> float:
+        """东方财富行情接口的实时估值(f71)"""
+        url = 'http://push2.eastmoney.com/api/qt/stock/get'
+        params = {
+            'secid': self._get_secid(fund_code),
+            'fields': STOCK_GET_FIELDS.keys(('estimate_nav',)),  # 只请求实时估值(f71)
+            'ut': 'fa5fd1943c7b386f172d6893dbfba10b',
+            'fltt': '2',
+            'cb': f'jQuery.jQuery{int(time.time() * 1000)}'
+        }
+        response = self._nav_get(url, timeout, params=params)
+        if response.status_code == 200:
+            data_text = response.text
+            json_str = data_text[data_text.index('(') + 1:data_text.rindex(')')]
+            data = json.loads(json_str)
+            if 'data' in data and data['data']:
+                return STOCK_GET_FIELDS.parse(data['data'], ('estimate_nav',))['estimate_nav']
+        return 0
+
+    def _nav_from_page(self, fund_code: str, timeout: float) -> float:
+        """从基金页面获取估值"""
+        url = f'http://fund.eastmoney.com/{fund_code}.html'
+        response = self._nav_get(url, timeout)
+        response.encoding = 'utf-8'
+        if response.status_code == 200:
+            text = response.text
+            est_index = text.find('"gz_gsz":"')
+            if est_index > -1:
+                est_parts = text[est_index:est_index+100].split('"')
+                for i, part in enumerate(est_parts):
+                    if part == 'gz_gsz':
+                        return float(est_parts[i+2])
+        return 0
+
+    def _nav_from_lsjz(self, fund_code: str, timeout: float) -> float:
+        """F10接口的最新历史净值，同一净值日内读取缓存"""
+        cached = self.fund_cache.get(fund_code).get('dwjz')
+        if cached:
+            return cached
+        url = f'http://fund.eastmoney.com/f10/F10DataApi.aspx?type=lsjz&code={fund_code}&page=1&per=1'
+        response = self._nav_get(url, timeout)
+        response.encoding = 'utf-8'
+        if response.status_code == 200 and 'value' in response.text:
+            text = response.text
+            nav = float(text.split('value')[1].split('"')[1])
+            # 连同净值日期写入缓存，基金尚未公布当日净值时缓存可按日期判断过期并重试；
+            # 取不到日期时不缓存，以免把旧净值当作当日净值
+            match = NAV_DATE_PATTERN.search(text)
+            if match:
+                self.fund_cache.update(fund_code, dwjz=nav, jzrq=match.group())
+            return nav
+        return 0
+
+    def _nav_sources(self):
+        """按优先级排列的净值来源：(名称, 获取函数, 单源超时秒数, 说明)"""
+        return [
+            ('fundgz', self._nav_from_fundgz, NAV_SOURCE_TIMEOUTS['fundgz'], '天天基金实时估值'),
+            ('push2', self._nav_from_push2, NAV_SOURCE_TIMEOUTS['push2'], '东方财富实时估值'),
+            ('page', self._nav_from_page, NAV_SOURCE_TIMEOUTS['page'], '页面实时估值'),
+            ('lsjz', self._nav_from_lsjz, NAV_SOURCE_TIMEOUTS['lsjz'], '历史净值')
+        ]
+
+    def _timed_nav(self, name: str, fetch, fund_code: str, timeout: float) -> float:
+        """调用单个来源并记录耗时，异常视为无效结果"""
+        start = time.perf_counter()
         try:
-            # 1. 首先尝试从天天基金获取实时估值（这个API对海外ETF更准确）
-            url = f'http://fundgz.1234567.com.cn/js/{fund_code}.js'
-            response = requests.get(url, headers=self.headers)
-            if response.status_code == 200 and len(response.text) > 8:
-                try:
-                    nav_data = json.loads(response.text[8:-2])
-                    est_nav = float(nav_data.get('gsz', 0))
-                    if est_nav > 0:
-                        print(f"获取到天天基金实时估值: {est_nav}")
-                        return est_nav
-                except:
-                    pass
-
-            # 2. 如果上面失败，尝试从东方财富API获取实时估值
-            url2 = 'http://push2.eastmoney.com/api/qt/stock/get'
-
-            # 处理基金代码格式
-            if fund_code.startswith(('50', '51', '52', '53', '56', '58')):
-                market = '1'  # 上证基金
-            else:
-                market = '0'  # 深证基金
-
-            params = {
-                'secid': f'{market}.{fund_code}',
-                'fields': 'f43,f58,f71,f169,f170,f171,f126,f168,f170,f161',  # f71是实时估值
-                'ut': 'fa5fd1943c7b386f172d6893dbfba10b',
-                'fltt': '2',
-                'cb': f'jQuery.jQuery{int(time.time() * 1000)}'
+            nav = fetch(fund_code, timeout)
+        except Exception:
+            nav = 0
+        self._record_nav_source(name, time.perf_counter() - start, nav > 0)
+        return nav
+
+    def _record_nav_source(self, name: str, latency: float, valid: bool, won: bool = False):
+        with self._nav_stats_lock:
+            item = self._nav_stats.setdefault(name, {'calls': 0, 'valid': 0, 'wins': 0, 'latency': 0.0})
+            if won:
+                item['wins'] += 1
+                return
+            item['calls'] += 1
+            item['valid'] += int(valid)
+            item['latency'] += latency
+
+    def nav_source_stats(self) -> Dict[str, Dict[str, float]]:
+        """各净值来源的调用次数、平均耗时(毫秒)、有效率与胜出率"""
+        with self._nav_stats_lock:
+            return {
+                name: {
+                    'calls': item['calls'],
+                    'avg_latency_ms': round(item['latency'] / item['calls'] * 1000, 1) if item['calls'] else 0.0,
+                    'valid_rate': round(item['valid'] / item['calls'], 4) if item['calls'] else 0.0,
+                    'win_rate': round(item['wins'] / item['calls'], 4) if item['calls'] else 0.0
+                }
+                for name, item in self._nav_stats.items()
             }
 
-            response2 = requests.get(url2, params=params, headers=self.headers)
-            if response2.status_code == 200:
-                data_text = response2.text
-                json_str = data_text[data_text.index('(') + 1:data_text.rindex(')')]
-                data = json.loads(json_str)
-                if 'data' in data and data['data']:
-                    est_nav = float(data['data'].get('f71', 0))
-                    if est_nav > 0:
-                        est_nav = est_nav   # 转换为元
-                        print(f"获取到东方财富实时估值: {est_nav}")
-                        return est_nav
-
-            # 3. 尝试从基金页面获取估值
-            url3 = f'http://fund.eastmoney.com/{fund_code}.html'
-            response3 = requests.get(url3, headers=self.headers)
-            response3.encoding = 'utf-8'
-
-            if response3.status_code == 200:
-                text = response3.text
-                # 先尝试获取估值
-                est_index = text.find('"gz_gsz":"')
-                if est_index > -1:
-                    est_text = text[est_index:est_index+100]
-                    est_parts = est_text.split('"')
-                    for i, part in enumerate(est_parts):
-                        if part == 'gz_gsz':
-                            est_nav = float(est_parts[i+2])
-                            print(f"从页面获取到实时估值: {est_nav}")
-                            return est_nav
-
-            # 4. 最后尝试获取历史净值
-            url4 = f'http://fund.eastmoney.com/f10/F10DataApi.aspx?type=lsjz&code={fund_code}&page=1&per=1'
-            response4 = requests.get(url4, headers=self.headers)
-            response4.encoding = 'utf-8'
-
-            if response4.status_code == 200:
-                text = response4.text
-                if 'value' in text:
-                    nav = float(text.split('value')[1].split('"')[1])
-                    print(f"获取到历史净值: {nav}")
-                    return nav
-
-            print(f"未能获取到基金 {fund_code} 的净值或估值")
-            return 0
+    def get_fund_nav(self, fund_code: str, hedged: bool = False, budget: float = 3.0) -> float:
+        """获取基金净值，优先获取实时估值；hedged=True时并发竞速各来源，budget为总耗时预算(秒)"""
+        if hedged:
+            return self._get_fund_nav_hedged(fund_code, budget)
 
-        except Exception as e:
-            print(f"获取净值失败: {str(e)}")
-            return 0
+        for name, fetch, timeout, label in self._nav_sources():
+            nav = self._timed_nav(name, fetch, fund_code, timeout)
+            if nav > 0:
+                self._record_nav_source(name, 0, True, won=True)
+                print(f"获取到{label}: {nav}")
+                return nav
+
+        print(f"未能获取到基金 {fund_code} 的净值或估值")
+        return 0
 
-    def get_fund_info(self, fund_code: str) -> Dict[str, Union[str, float]]:
-        """获取基金基本信息"""
+    def _raced_nav(self, responses: List, name: str, fetch, fund_code: str, timeout: float) -> float:
+        """在竞速线程中调用单个来源，期间的响应登记到responses"""
+        self._nav_race.responses = responses
+        try:
+            return self._timed_nav(name, fetch, fund_code, timeout)
+        finally:
+            self._nav_race.responses = None
+
+    def _get_fund_nav_hedged(self, fund_code: str, budget: float) -> float:
+        """对冲请求：先只请求最高优先级来源，NAV_HEDGE_DELAY内没有有效结果或该来源失败时再启动下一个；
+        低优先级的有效结果先作为候选，直到更高优先级的来源都已失败或超过各自时限才胜出，落选请求的响应随即关闭"""
+        deadline = time.monotonic() + budget
+        pending = self._nav_sources()
+        running = {}  # future -> (优先级, 名称, 说明, 响应列表, 该来源的截止时刻)
+        best = None  # 当前候选 (优先级, 名称, 说明, 净值)
+        executor = ThreadPoolExecutor(max_workers=len(pending))
+        try:
+            launched = 0
+            next_launch = time.monotonic()
+            while True:
+                now = time.monotonic()
+                # 比候选优先级高的来源都已结束或超时，候选胜出
+                if best is not None and all(info[0] > best[0] or now >= info[4] for info in running.values()):
+                    break
+                if now >= deadline:
+                    break
+                # 已有候选时更低优先级的来源不可能胜出，不再启动
+                can_launch = pending and best is None
+                if can_launch and (not running or now >= next_launch):
+                    name, fetch, timeout, label = pending.pop(0)
+                    timeout = min(timeout, deadline - now)
+                    responses = []
+                    future = executor.submit(self._raced_nav, responses, name, fetch, fund_code, timeout)
+                    running[future] = (launched, name, label, responses, now + timeout)
+                    launched += 1
+                    next_launch = now + NAV_HEDGE_DELAY
+                    continue
+                if not running:
+                    break
+                wait_until = min([deadline, next_launch] if can_launch else [deadline] +
+                                 [info[4] for info in running.values() if info[4] > now])
+                done, _ = wait(running, timeout=max(0, wait_until - now), return_when=FIRST_COMPLETED)
+                for future in done:
+                    priority, name, label, _, _ = running.pop(future)
+                    nav = future.result()
+                    if nav > 0 and (best is None or priority < best[0]):
+                        best = (priority, name, label, nav)
+                if done:
+                    # 有来源失败时不必等待对冲延迟
+                    next_launch = now
+        finally:
+            for info in running.values():
+                for response in info[3]:
+                    response.close()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if best is not None:
+            _, name, label, nav = best
+            self._record_nav_source(name, 0, True, won=True)
+            print(f"获取到{label}: {nav}")
+            return nav
+        print(f"未能在 {budget} 秒内获取到基金 {fund_code} 的净值或估值")
+        return 0
+
+    def get_fund_info(self, fund_code: str) -> Union[Quote, Dict[str, str]]:
+        """获取基金基本信息，TTL内优先读取本地缓存"""
+        cached = self.cache.get('fund_info', f'fund:{fund_code}')
+        if cached is not None:
+            return Quote.from_dict(cached)
+
+        result = self._fetch_fund_info(fund_code)
+        if 'error' not in result:
+            self.cache.put('fund_info', f'fund:{fund_code}', result)
+            return Quote.from_dict(result)
+        return result
+
+    def _fetch_fund_info(self, fund_code: str) -> Dict[str, Union[str, float]]:
+        """请求接口获取基金基本信息"""
         try:
             # 使用东方财富的行情API
             url = 'http://push2.eastmoney.com/api/qt/stock/get'
 
-            # 处理基金代码格式
-            if fund_code.startswith(('50', '51', '52', '53', '56', '58')):
-                market = '1'  # 上证基金
-            else:
-                market = '0'  # 深证基金
-
             params = {
-                'secid': f'{market}.{fund_code}',
-                'fields': 'f43,f58,f8,f51,f169,f170,f171,f116,f71,f161',  # f169是涨跌，f170是涨跌幅
+                'secid': self._get_secid(fund_code),
+                'fields': STOCK_GET_FIELDS.keys(FUND_INFO_NAMES),
                 'ut': 'fa5fd1943c7b386f172d6893dbfba10b',
                 'fltt': '2',
                 'cb': f'jQuery.jQuery{int(time.time() * 1000)}'
             }
 
-            response = requests.get(url, params=params, headers=self.headers)
+            response = self.http.get(url, params=params, headers=self.headers)
             data_text = response.text
 
             try:
@@ -123,105 +296,54 @@ class FundUtils:
             if 'data' not in data or not data['data']:
                 return {'error': '数据为空'}
 
-            stock_data = data['data']
-
-            # 打印原始数据
-            # print("\n原始数据:")
-            # print(f"价格(f43): {stock_data.get('f43')}")
-            # print(f"名称(f58): {stock_data.get('f58')}")
-            # print(f"换手率1(f8): {stock_data.get('f8')}")
-            # print(f"换手率2(f51): {stock_data.get('f51')}")
-            # print(f"涨跌幅(f170): {stock_data.get('f170')}")
-            # print(f"总市值(f116): {stock_data.get('f116')}")
-            # print(f"估值(f71): {stock_data.get('f71')}")
-            # print(f"溢价率(f161): {stock_data.get('f161')}")
-            # print(f"净值1(f111): {stock_data.get('f111')}")
-            # print(f"净值2(f191): {stock_data.get('f191')}")
-            # print(f"净值3(f192): {stock_data.get('f192')}")
-
-            def safe_float(value, default=0):
-                if not value or value == '':
-                    return default
-                try:
-                    return float(value)
-                except:
-                    return default
+            # 按字段注册表换算单位，停牌等情况返回的'-'视为0
+            info = STOCK_GET_FIELDS.parse(data['data'], FUND_INFO_NAMES)
 
             # 获取基本信息
-            price = safe_float(stock_data.get('f43'))
+            price = info['price']
             if price == 0:
                 return {'error': '基金价格为0或未获取到'}
 
-            fund_name = stock_data.get('f58', '')
-
-            # 优先使用f170（涨跌幅），如果为空则使用f169（涨跌）计算
-            change_percent = safe_float(stock_data.get('f170'))
+            # 优先使用涨跌幅，如果为空则使用涨跌额计算
+            change_percent = info['change_percent']
             if change_percent == 0:
-                change = safe_float(stock_data.get('f169'))
+                change = info['change']
                 if price > 0 and change != 0:
                     change_percent = (change / (price - change)) * 100
 
-            turnover_rate = safe_float(stock_data.get('f8'))
-            if turnover_rate == 0:
-                turnover_rate = safe_float(stock_data.get('f51'))
-            fund_amount = safe_float(stock_data.get('f116'))
+            turnover_rate = info['fund_turnover_rate'] or info['fund_turnover_rate_alt']
 
             # 获取估值并计算溢价率
-            est_nav = safe_float(stock_data.get('f71'))
+            est_nav = info['estimate_nav']
             if est_nav > 0:
-                est_nav = est_nav  # 转换为元
-                premium_rate = round((price / est_nav - 1) * 100, 2)  # 修正溢价率计算公式
+                premium_rate = round((price / est_nav - 1) * 100, 2)
             else:
                 est_nav = 0
                 premium_rate = 0
 
-            result = {
+            return {
                 'code': fund_code,
-                'name': fund_name,
+                'name': info['name'],
                 'price': price,
                 'change_percent': change_percent,
-                'market_value': round(fund_amount / 100000000, 2),
+                'market_value': round(info['market_value'], 2),
                 'premium_rate': premium_rate,
                 'turnover_rate': turnover_rate,
                 'nav': est_nav
             }
 
-            # print("\n处理结果:")
-            # print(json.dumps(result, indent=2, ensure_ascii=False))
-
-            return result
-
         except Exception as e:
             print(f"处理基金 {fund_code} 时出错: {str(e)}")
             return {'error': f'获取数据失败: {str(e)}'}
 
     def check_purchase_status(self, fund_code: str) -> Dict[str, Union[bool, str, float]]:
-        """检查基金是否可以申购及申购限额"""
-        try:
-            # 获取基金申购状态
-            url = f"http://fundgz.1234567.com.cn/js/{fund_code}.js"
-            response = requests.get(url, headers=self.headers)
-
-            # 通过天天基金获取申购状态
-            url2 = f"http://fund.eastmoney.com/{fund_code}.html"
-            response2 = requests.get(url2, headers=self.headers)
-
-            # 如果基金已经终止或者暂停申购，页面会有相关提示
-            if "暂停申购" in response2.text or "终止" in response2.text:
-                return {
-                    'can_purchase': False,
-                    'message': '基金暂停申购或已终止',
-                    'limit': 0
-                }
-
-            # 获取申购限额（实际应用中需要根据具体基金的页面结构解析）
-            # 这里简单处理，假设都可以申购，限额设为一个较大值
-            return {
-                'can_purchase': True,
-                'message': '可以申购',
-                'limit': 1000000  # 默认限额100万
-            }
+        """检查基金是否可以申购及申购限额（元，None表示不限额），同一净值日内读取缓存"""
+        cached = self.fund_cache.get(fund_code).get('purchase')
+        if cached is not None:
+            return cached
 
+        try:
+            result = self._purchase_from_api(fund_code) or self._purchase_from_page(fund_code)
         except Exception as e:
             return {
                 'can_purchase': False,
@@ -229,46 +351,108 @@ class FundUtils:
                 'limit': 0
             }
 
-    def get_fund_list(self) -> list:
-        """获取场内基金列表"""
-        funds = []
+        self.fund_cache.update(fund_code, purchase=result)
+        return result
+
+    def check_purchase_statuses(self, fund_codes: List[str], max_workers: int = 8,
+                                rate: float = 10.0) -> Dict[str, Dict[str, Union[bool, str, float]]]:
+        """批量并发检查申购状态，返回 {代码: 结果}，按输入顺序排列"""
+        limiter = TokenBucket(rate=rate, burst=max_workers)
+
+        def check(fund_code):
+            # 命中缓存时不占用限流令牌
+            cached = self.fund_cache.get(fund_code).get('purchase')
+            if cached is not None:
+                return cached
+            limiter.acquire()
+            return self.check_purchase_status(fund_code)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = dict(zip(fund_codes, executor.map(check, fund_codes)))
+        return {code: results[code] for code in fund_codes}
+
+    @staticmethod
+    def _purchase_result(status: str, limit: Optional[float]) -> Dict[str, Union[bool, str, float]]:
+        """根据申购状态文本与单日限额构造结果"""
+        if '暂停申购' in status or '终止' in status:
+            return {'can_purchase': False, 'message': '基金暂停申购或已终止', 'limit': 0}
+        return {'can_purchase': True, 'message': status or '可以申购', 'limit': limit}
+
+    def _purchase_from_api(self, fund_code: str) -> Optional[Dict[str, Union[bool, str, float]]]:
+        """天天基金移动端详情接口，返回紧凑JSON（SGZT申购状态、MAXSG单日限额）"""
+        url = 'https://fundmobapi.eastmoney.com/FundMNewApi/FundMNDetailInformation'
+        params = {
+            'FCODE': fund_code,
+            'deviceid': 'Wap',
+            'plat': 'Wap',
+            'product': 'EFund',
+            'version': '6.0.0'
+        }
         try:
-            # 使用东方财富行情中心的API
-            url = "http://push2.eastmoney.com/api/qt/clist/get"
-            params = {
-                'pn': 1,
-                'pz': 2000,
-                'po': 1,
-                'np': 1,
-                'ut': 'bd1d9ddb04089700cf9c27f6f7426281',
-                'fltt': 2,
-                'invt': 2,
-                'fid': 'f3',
-                'fs': 'b:MK0021,b:MK0022',  # MK0021是LOF基金，MK0022是ETF基金
-                'fields': 'f12,f14',  # f12:代码, f14:名称
-                'cb': f'jQuery.jQuery{int(time.time() * 1000)}'
-            }
-
-            response = requests.get(url, params=params, headers=self.headers)
-            if response.status_code == 200:
-                data_text = response.text
-                json_str = data_text[data_text.index('(') + 1:data_text.rindex(')')]
-                data = json.loads(json_str)
+            response = self.http.get(url, params=params, headers=self.headers)
+            data = response.json().get('Datas') or {}
+        except Exception:
+            return None
+        status = data.get('SGZT')
+        if not status:
+            return None
 
-                if 'data' in data and 'diff' in data['data']:
-                    for item in data['data']['diff']:
-                        code = item.get('f12', '')
-                        name = item.get('f14', '')
-                        print(f"检查: {code} - {name}")
-                        # 只保留LOF基金
-                        if code and (code.startswith('16') or code.startswith('501')):
-                            funds.append(code)
-
-            print(f"总共获取到 {len(funds)} 只LOF基金")
-
-        except Exception as e:
-            print(f"获取基金列表失败: {str(e)}")
-            if 'data_text' in locals():
-                print(f"错误详情: {data_text}")
+        try:
+            limit = float(data.get('MAXSG'))
+            limit = limit if limit > 0 else None
+        except (TypeError, ValueError):
+            limit = None
+        return self._purchase_result(status, limit)
+
+    def _purchase_from_page(self, fund_code: str) -> Dict[str, Union[bool, str, float]]:
+        """流式读取基金页面，读到交易状态后立即停止下载"""
+        url = f"http://fund.eastmoney.com/{fund_code}.html"
+        text = ''
+        with self.http.get(url, headers=self.headers, stream=True) as response:
+            response.raise_for_status()
+            response.encoding = 'utf-8'
+            for chunk in response.iter_content(chunk_size=8192, decode_unicode=True):
+                text += chunk
+                pos = text.find('交易状态')
+                # 交易状态及限额说明都在其后几百字符内
+                if pos > -1 and len(text) - pos >= 400:
+                    text = re.sub(r'<[^>]+>', '', text[pos:pos + 400])
+                    break
+
+        if "暂停申购" in text or "终止" in text:
+            return self._purchase_result('暂停申购', 0)
+        match = PURCHASE_LIMIT_PATTERN.search(text)
+        if match:
+            limit = float(match.group(1)) * {'万': 1e4, '亿': 1e8}.get(match.group(2), 1)
+            return self._purchase_result('限大额', limit)
+        return self._purchase_result('可以申购', None)
+
+    def iter_fund_list(self, kinds: Tuple[str, ...] = ('lof', 'etf'),
+                       prefixes: Optional[Tuple[str, ...]] = None) -> Iterator[Dict[str, str]]:
+        """分页并发遍历场内基金，逐条产出 {'code', 'name', 'kind'}"""
+        seen = set()
+        for kind in kinds:
+            for item in iter_clist(FUND_BOARDS[kind], 'f12,f14', http=self.http, headers=self.headers):  # f12:代码, f14:名称
+                code = str(item.get('f12', ''))
+                if code and code not in seen and (not prefixes or code.startswith(prefixes)):
+                    seen.add(code)
+                    yield {'code': code, 'name': item.get('f14', ''), 'kind': kind}
+
+    def get_fund_list(self, kinds: Tuple[str, ...] = ('lof', 'etf'),
+                      prefixes: Optional[Tuple[str, ...]] = ('16', '501')) -> list:
+        """获取场内基金代码列表，默认只保留LOF基金代码，结果按交易日缓存"""
+        key = f"fund_list:{','.join(kinds)}:{trading_date()}"
+        cached = self.cache.get('static', key)
+        if cached is not None:
+            items = cached['items']
+        else:
+            try:
+                items = list(self.iter_fund_list(kinds))
+                self.cache.put('static', key, {'items': items})
+            except Exception as e:
+                print(f"获取基金列表失败: {str(e)}")
+                return []
 
+        funds = [item['code'] for item in items if not prefixes or item['code'].startswith(prefixes)]
+        print(f"总共获取到 {len(funds)} 只基金")
         return funds
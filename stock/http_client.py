@@ -0,0 +1,91 @@
+import threading
+from typing import TYPE_CHECKING, Dict, Optional
+
+if TYPE_CHECKING:
+    import requests
+
+try:
+    import brotli  # noqa: F401  安装后urllib3才能解码br
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+DEFAULT_TIMEOUT = (3.05, 10)  # (连接超时, 读取超时)
+
+
+class HttpClient:
+    """共享的HTTP传输层：按host复用连接池、保持长连接、统一超时"""
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 16,
+                 timeout=DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self._session: Optional['requests.Session'] = None
+        self._adapter = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> 'requests.Session':
+        """首次发请求时才导入requests并建立会话，只读缓存的查询无需加载"""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+                    from http_adapter import PooledAdapter
+
+                    session = requests.Session()
+                    session.headers.update({
+                        'Accept-Encoding': ACCEPT_ENCODING,
+                        'Connection': 'keep-alive'
+                    })
+                    adapter = PooledAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self._adapter = adapter
+                    self._session = session
+        return self._session
+
+    def get(self, url: str, **kwargs) -> 'requests.Response':
+        """发送GET请求，未指定timeout时使用默认超时"""
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """按host统计请求数、新建连接数与复用次数"""
+        if self._adapter is None:
+            return {}
+        from http_adapter import connect_counts, count_lock
+
+        stats = {}
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = f'{pool.scheme}://{pool.host}:{pool.port}'
+            item = stats.setdefault(host, {'requests': 0, 'opened': 0, 'reused': 0})
+            item['requests'] += pool.num_requests
+        with count_lock:
+            for host, item in stats.items():
+                item['opened'] = connect_counts.get(host, 0)
+                item['reused'] = max(0, item['requests'] - item['opened'])
+        return stats
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """获取进程内共享的HttpClient"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient()
+    return _client
@@ -1,17 +1,56 @@
 from stock_utils import StockUtils
-import requests
+from http_client import get_http_client
+from rate_limiter import TokenBucket
+from symbol_master import get_symbol_master
+from field_registry import STOCK_GET_FIELDS
+from concurrent.futures import ThreadPoolExecutor
 import json
-from typing import List, Dict
+import threading
+from typing import Callable, List, Dict
 import time
 from datetime import datetime
 import pandas as pd
 
+# 市值与市场情绪所需字段的并集，名称见字段注册表
+QUOTE_FIELDS = ('market_value', 'volume_ratio', 'commission_ratio')
+
+
+class QuoteContext:
+    """单次分析运行的数据上下文：每只股票首次访问时请求一次，之后各指标共享"""
+
+    def __init__(self, fetcher: Callable[[str], Dict]):
+        self._fetcher = fetcher
+        self._data: Dict[str, Dict] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def get(self, code: str) -> Dict:
+        with self._guard:
+            lock = self._locks.setdefault(code, threading.Lock())
+        # 同一股票的并发访问等待首次请求完成
+        with lock:
+            if code not in self._data:
+                try:
+                    self._data[code] = self._fetcher(code)
+                except Exception as e:
+                    # 失败结果同样缓存，避免各指标重复请求
+                    print(f"获取 {code} 行情字段时出错: {str(e)}")
+                    self._data[code] = {}
+            return self._data[code]
+
+
 class HuaweiAscendAnalyzer:
-    def __init__(self):
+    def __init__(self, max_workers: int = 8, rate: float = 10.0, burst: int = 5):
         self.stock_utils = StockUtils()
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        # 与其他工具类共享连接池
+        self.http = get_http_client()
+        self.symbols = get_symbol_master()
+        # 并发请求数及令牌桶限流（每秒rate个请求，允许burst个突发）
+        self.max_workers = max_workers
+        self.rate_limiter = TokenBucket(rate=rate, burst=burst)
         # 华为昇腾概念股代码列表（示例，需要定期更新）
         self.concept_stocks = self._get_concept_stocks()
 
@@ -31,32 +70,52 @@ class HuaweiAscendAnalyzer:
             '688123'   # 聚辰股份
         ]
 
-    def _get_market_sentiment(self, stock_code: str) -> float:
-        """计算市场情绪得分（0-100）"""
+    def _get(self, url: str, params: Dict):
+        """经限流器发送请求"""
+        self.rate_limiter.acquire()
+        return self.http.get(url, params=params, headers=self.headers)
+
+    def _fetch_quote_fields(self, stock_code: str) -> Dict:
+        """一次请求获取所有指标所需的行情字段并集"""
+        url = 'http://push2his.eastmoney.com/api/qt/stock/get'
+        params = {
+            'secid': self.symbols.resolve(stock_code)['secid'],
+            'fields': STOCK_GET_FIELDS.keys(QUOTE_FIELDS),
+            'ut': 'fa5fd1943c7b386f172d6893dbfba10b',
+            'fltt': '2',
+            'cb': 'jQuery.jQuery' + str(int(time.time() * 1000))
+        }
+        response = self._get(url, params)
+
+        # 处理JSONP响应
+        data_text = response.text
+        json_str = data_text[data_text.index('(') + 1:data_text.rindex(')')]
+        data = json.loads(json_str)
+
+        if not data.get('data'):
+            return {}
+        return STOCK_GET_FIELDS.parse(data['data'], QUOTE_FIELDS)
+
+    def _get_market_value(self, stock_code: str, context: 'QuoteContext') -> float:
+        """获取总市值（亿元）"""
         try:
-            url = 'http://push2his.eastmoney.com/api/qt/stock/get'
-            params = {
-                'secid': f"{'1' if stock_code.startswith('6') or stock_code.startswith('688') else '0'}.{stock_code}",
-                'fields': 'f43,f44,f45,f46,f47,f48,f50,f51,f52,f53',  # 成交量、委比、量比等指标
-                'ut': 'fa5fd1943c7b386f172d6893dbfba10b',
-                'fltt': '2',
-                'cb': 'jQuery.jQuery' + str(int(time.time() * 1000))
-            }
-            response = requests.get(url, params=params, headers=self.headers)
+            stock_data = context.get(stock_code)
+            return stock_data.get('market_value', 0)
 
-            # 处理JSONP响应
-            data_text = response.text
-            json_str = data_text[data_text.index('(') + 1:data_text.rindex(')')]
-            data = json.loads(json_str)
+        except Exception as e:
+            print(f"获取市值时出错: {str(e)}")
+            return 0
 
-            if 'data' not in data or not data['data']:
+    def _get_market_sentiment(self, stock_code: str, context: 'QuoteContext') -> float:
+        """计算市场情绪得分（0-100）"""
+        try:
+            stock_data = context.get(stock_code)
+            if not stock_data:
                 return 0
 
-            stock_data = data['data']
-
             # 计算情绪得分（示例算法）
-            volume_ratio = float(stock_data.get('f50', 100)) / 100  # 量比
-            commission_ratio = float(stock_data.get('f48', 0))  # 委比
+            volume_ratio = stock_data.get('volume_ratio', 1)  # 量比
+            commission_ratio = stock_data.get('commission_ratio', 0)  # 委比(%)
 
             # 简单的情绪计算公式
             sentiment = min(100, max(0, (volume_ratio * 20 + (commission_ratio + 100) / 2) / 2))
@@ -71,7 +130,7 @@ class HuaweiAscendAnalyzer:
         try:
             url = f"http://push2his.eastmoney.com/api/qt/stock/trends2/get"
             params = {
-                'secid': f"{'1' if stock_code.startswith('6') or stock_code.startswith('688') else '0'}.{stock_code}",
+                'secid': self.symbols.resolve(stock_code)['secid'],
                 'fields1': 'f1,f2,f3,f4,f5,f6,f7,f8,f9,f10,f11',
                 'fields2': 'f51,f53',
                 'ndays': 1,
@@ -80,7 +139,7 @@ class HuaweiAscendAnalyzer:
                 'cb': 'jQuery.jQuery' + str(int(time.time() * 1000))
             }
 
-            response = requests.get(url, params=params, headers=self.headers)
+            response = self._get(url, params)
 
             # 处理JSONP响应
             data_text = response.text
@@ -115,49 +174,39 @@ class HuaweiAscendAnalyzer:
         """分析所有华为昇腾概念股"""
         results = []
 
-        for stock_code in self.concept_stocks:
+        # 一次请求批量获取所有概念股行情
+        stock_infos = self.stock_utils.get_stock_infos(self.concept_stocks)
+        valid_codes = [code for code in self.concept_stocks if 'error' not in stock_infos[code]]
+
+        # 本次运行的数据上下文，每只股票的字段并集只请求一次
+        context = QuoteContext(self._fetch_quote_fields)
+
+        # 并发获取各项指标，由令牌桶控制请求频率
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                code: (
+                    executor.submit(self._get_market_value, code, context),
+                    executor.submit(self._get_volume_change_rate, code),
+                    executor.submit(self._get_market_sentiment, code, context)
+                )
+                for code in valid_codes
+            }
+
+        for stock_code in valid_codes:
             try:
-                stock_info = self.stock_utils.get_stock_info(stock_code)
-                if 'error' in stock_info:
-                    continue
-
-                # 获取市值信息
-                url = f"http://push2his.eastmoney.com/api/qt/stock/get"
-                params = {
-                    'secid': f"{'1' if stock_code.startswith('6') or stock_code.startswith('688') else '0'}.{stock_code}",
-                    'fields': 'f116',  # 市值信息
-                    'ut': 'fa5fd1943c7b386f172d6893dbfba10b',
-                    'fltt': '2',
-                    'cb': 'jQuery.jQuery' + str(int(time.time() * 1000))
-                }
-                response = requests.get(url, params=params, headers=self.headers)
-
-                # 处理JSONP响应
-                data_text = response.text
-                json_str = data_text[data_text.index('(') + 1:data_text.rindex(')')]
-                data = json.loads(json_str)
-
-                if 'data' in data and data['data']:
-                    market_value = float(data['data'].get('f116', 0)) / 100000000  # 转换为亿元
-                else:
-                    market_value = 0
-
-                # 获取成交量变化率
-                volume_change = self._get_volume_change_rate(stock_code)
+                stock_info = stock_infos[stock_code]
+                market_value, volume_change, sentiment = (f.result() for f in futures[stock_code])
 
                 results.append({
                     'code': stock_code,
                     'name': stock_info['name'],
-                    'price': stock_info['price'] * 1000,
-                    'change_percent': stock_info['change_percent'] * 100,
+                    'price': stock_info['price'],
+                    'change_percent': stock_info['change_percent'],
                     'market_value': market_value,
-                    'sentiment': self._get_market_sentiment(stock_code),
+                    'sentiment': sentiment,
                     'volume_change_rate': volume_change
                 })
 
-                # 避免请求过于频繁
-                time.sleep(0.5)
-
             except Exception as e:
                 print(f"处理股票 {stock_code} 时出错: {str(e)}")
                 continue
@@ -209,5 +258,9 @@ def main():
     analyzer = HuaweiAscendAnalyzer()
     analyzer.analyze_stocks()
 
+    # 打印连接复用情况
+    for host, item in analyzer.http.stats().items():
+        print(f"{host} 请求: {item['requests']} 新建连接: {item['opened']} 复用: {item['reused']}")
+
 if __name__ == "__main__":
     main()
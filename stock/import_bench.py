@@ -0,0 +1,71 @@
+"""各入口脚本的启动耗时基准：基于 python -X importtime 统计导入耗时及是否加载了重型依赖
+
+用法: python import_bench.py [运行次数]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+STOCK_DIR = os.path.dirname(os.path.abspath(__file__))
+WORKFLOWS_DIR = os.path.join(os.path.dirname(STOCK_DIR), 'workflows')
+
+# (入口名称, 所在目录, 模块名)
+ENTRY_POINTS = [
+    ('stock_query', STOCK_DIR, 'stock_query'),
+    ('market_monitor', STOCK_DIR, 'market_monitor'),
+    ('fund_scanner', STOCK_DIR, 'fund_scanner'),
+    ('huawei_ascend_analysis', STOCK_DIR, 'huawei_ascend_analysis'),
+    ('quote_cache', STOCK_DIR, 'quote_cache'),
+    ('sse_stand_in', STOCK_DIR, 'sse_stand_in'),
+    ('monitor_hk_market', WORKFLOWS_DIR, 'monitor_hk_market'),
+]
+
+# 需要关注是否在启动时被加载的重型依赖
+HEAVY_MODULES = ('pandas', 'numpy', 'matplotlib', 'mplfinance', 'requests', 'akshare')
+
+
+def import_profile(directory: str, module: str) -> dict:
+    """运行一次 -X importtime，返回模块自身的累计导入耗时(毫秒)及已加载的重型依赖"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=directory, capture_output=True, text=True
+    )
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        # 格式: import time: 自身耗时 | 累计耗时 | 模块名(按层级缩进)
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        cumulative[name.strip()] = int(cumulative_us)
+    return {
+        'ok': result.returncode == 0,
+        'import_ms': cumulative.get(module, 0) / 1000,
+        'heavy': [name for name in HEAVY_MODULES if name in cumulative]
+    }
+
+
+def wall_time(directory: str, module: str) -> float:
+    """启动解释器并导入模块的总耗时(毫秒)"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', f'import {module}'], cwd=directory, capture_output=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    baseline = statistics.median(wall_time(STOCK_DIR, 'sys') for _ in range(runs))
+    print(f"解释器空启动: {baseline:.0f} ms")
+    print(f"{'入口':<24}{'总耗时(ms)':>12}{'导入(ms)':>10}  启动时加载的重型依赖")
+    for name, directory, module in ENTRY_POINTS:
+        profile = import_profile(directory, module)
+        if not profile['ok']:
+            print(f"{name:<24}{'导入失败':>12}")
+            continue
+        total = statistics.median(wall_time(directory, module) for _ in range(runs))
+        print(f"{name:<24}{total:>12.0f}{profile['import_ms']:>10.0f}  {', '.join(profile['heavy']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""K线图价格线与成交额柱绘制基准：逐分钟ax.plot/ax.bar与单个LineCollection/一次bar调用比较耗时，
+并核对两种画法输出的图片像素是否一致
+
+用法: python kline_bench.py [重复次数]
+"""
+import io
+import statistics
+import sys
+import time
+from datetime import datetime
+
+
+def synthetic_timeline(seed: int):
+    """一天240根分钟线的合成分时数据，结构与StockUtils.get_timeline_data一致"""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    day = datetime.now().strftime('%Y-%m-%d')
+    index = pd.date_range(f'{day} 09:30', periods=120, freq='min').append(
+        pd.date_range(f'{day} 13:00', periods=120, freq='min'))
+    price = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, len(index))))
+    return pd.DataFrame({
+        'price': price,
+        'volume': rng.integers(100, 10000, len(index)).astype('float64'),
+        'amount': price * 1000,
+        'avg_price': np.cumsum(price) / np.arange(1, len(index) + 1),
+        'pre_close': 100.0,
+        'name': f'合成{seed}'
+    }, index=index)
+
+
+def draw_per_segment(ax_price, ax_volume, data, pre_close: float):
+    """原画法：每分钟一次ax.plot、一次ax.bar"""
+    price_color = ['red' if p >= pre_close else 'green' for p in data['price']]
+    for i in range(1, len(data['price'])):
+        ax_price.plot(data.index[i-1:i+1], data['price'].iloc[i-1:i+1],
+                      color=price_color[i], linewidth=1.2, alpha=0.9)
+    amount_in_10m = data['amount'] / 1000
+    for i in range(len(amount_in_10m)):
+        if i > 0:
+            color = 'red' if data['price'].iloc[i] > data['price'].iloc[i-1] else 'green'
+        else:
+            color = 'red' if data['price'].iloc[i] > pre_close else 'green'
+        ax_volume.bar(data.index[i], amount_in_10m.iloc[i], color=color, alpha=0.7, width=0.0003)
+
+
+def draw_vectorized(ax_price, ax_volume, data, pre_close: float):
+    """现画法：与stock_query.render_kline单日分支一致"""
+    import numpy as np
+    import matplotlib.dates as mdates
+    from matplotlib.collections import LineCollection
+
+    x = mdates.date2num(data.index.to_pydatetime())
+    prices = data['price'].to_numpy(dtype=float)
+    points = np.column_stack([x, prices])
+    segments = np.stack([points[:-1], points[1:]], axis=1)
+    price_color = np.where(prices[1:] >= pre_close, 'red', 'green')
+    ax_price.xaxis_date()
+    ax_price.add_collection(LineCollection(segments, colors=price_color, linewidths=1.2, alpha=0.9,
+                                           capstyle='projecting', joinstyle='round'))
+    ax_price.autoscale_view()
+    previous = np.concatenate([[pre_close], prices[:-1]])
+    bar_color = np.where(prices > previous, 'red', 'green')
+    ax_volume.bar(data.index, (data['amount'] / 1000).to_numpy(), color=bar_color, alpha=0.7, width=0.0003)
+
+
+def render(draw, data, pre_close: float) -> bytes:
+    """按render_kline的版面绘制价格与成交额两个面板并编码为PNG"""
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(15, 8))
+    ax_price = plt.subplot2grid((6, 1), (0, 0), rowspan=5)
+    ax_volume = plt.subplot2grid((6, 1), (5, 0), rowspan=1, sharex=ax_price)
+    draw(ax_price, ax_volume, data, pre_close)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=100)
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def differing_pixels(a: bytes, b: bytes) -> int:
+    import numpy as np
+    from PIL import Image
+
+    with Image.open(io.BytesIO(a)) as image_a, Image.open(io.BytesIO(b)) as image_b:
+        pixels_a, pixels_b = np.asarray(image_a.convert('RGBA')), np.asarray(image_b.convert('RGBA'))
+    if pixels_a.shape != pixels_b.shape:
+        return -1
+    return int((pixels_a != pixels_b).any(axis=-1).sum())
+
+
+def main():
+    import matplotlib
+    matplotlib.use('Agg')
+
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    data = synthetic_timeline(0)
+    pre_close = float(data['pre_close'].iloc[0])
+    # 预热字体与后端，不计入耗时
+    render(draw_vectorized, data, pre_close)
+
+    images = {}
+    for label, draw in (('逐分钟plot/bar', draw_per_segment), ('LineCollection/单次bar', draw_vectorized)):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            images[label] = render(draw, data, pre_close)
+            timings.append(time.perf_counter() - start)
+        print(f"{label}: 中位数 {statistics.median(timings) * 1000:.0f} ms（{repeat}次，{len(data)}个分钟点）")
+
+    diff = differing_pixels(*images.values())
+    print('两种画法像素一致' if diff == 0 else f'两种画法不一致: {diff} 个像素不同' if diff > 0 else '图片尺寸不同')
+
+
+if __name__ == "__main__":
+    main()
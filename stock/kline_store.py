@@ -0,0 +1,49 @@
+import os
+from typing import TYPE_CHECKING, Optional, Tuple
+
+from quote_cache import cache_dir
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+KLINE_COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+
+class KlineStore:
+    """本地日K线列式存储，每个secid/复权类型一个.npz文件"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(cache_dir(), 'kline')
+        os.makedirs(self.path, exist_ok=True)
+
+    def _file(self, secid: str, fqt: str) -> str:
+        return os.path.join(self.path, f'{secid}_{fqt}.npz')
+
+    def load(self, secid: str, fqt: str) -> Tuple[Optional['pd.DataFrame'], Optional['pd.Timestamp']]:
+        """读取已存储的K线及其覆盖的起始日期，不存在时返回(None, None)"""
+        import numpy as np
+        import pandas as pd
+
+        try:
+            with np.load(self._file(secid, fqt)) as data:
+                df = pd.DataFrame(
+                    {column: data[column] for column in KLINE_COLUMNS},
+                    index=pd.to_datetime(data['date'].astype(str))  # 与接口解析结果的时间精度保持一致
+                )
+                return df, pd.Timestamp(data['covered_from'].item())
+        except (OSError, KeyError, ValueError):
+            return None, None
+
+    def save(self, secid: str, fqt: str, df: 'pd.DataFrame', covered_from: 'pd.Timestamp'):
+        """原子写入K线数据，covered_from为已完整覆盖的起始日期"""
+        import numpy as np
+
+        target = self._file(secid, fqt)
+        tmp = f'{target}.{os.getpid()}.tmp.npz'
+        np.savez(
+            tmp,
+            date=df.index.values.astype('datetime64[D]'),
+            covered_from=np.datetime64(covered_from.normalize(), 'D'),
+            **{column: df[column].to_numpy(dtype='float64') for column in KLINE_COLUMNS}
+        )
+        os.replace(tmp, target)
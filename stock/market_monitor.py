@@ -10,12 +10,16 @@ sys.path.append(workflow_dir)
 
 from stock_utils import StockUtils
 from fund_utils import FundUtils
+from symbol_master import get_symbol_master
+from search_index import suggestion_items
+from field_registry import QUOTE_NAMES
+from query_client import forward
 
 def format_security_info(result: Dict[str, Union[str, float]], is_fund: bool = False) -> Dict:
     """格式化证券信息为 workflow 格式"""
-    # 股票价格不需要乘以100，只有涨跌幅需要
-    price = result['price'] if is_fund else result['price'] * 1000
-    change = result['change_percent'] if is_fund else result['change_percent'] * 100
+    # 股票与基金的数值均已按字段注册表换算为元、%、亿，这里直接展示
+    price = result['price']
+    change = result['change_percent']
 
     # 构建标题（名称、代码、价格和涨跌）
     title = f"{result['name']}({result['code']}) 价格:{price:>8.3f} 涨幅:{change:>+6.2f}%"
@@ -31,14 +35,11 @@ def format_security_info(result: Dict[str, Union[str, float]], is_fund: bool = F
     else:
         # 股票数据处理，使用与 stock_query.py 相同的字段
         if 'turnover_rate' in result:
-            turnover = result['turnover_rate'] * 100
-            subtitle_parts.append(f"换手: {turnover:>6.2f}%")
+            subtitle_parts.append(f"换手: {result['turnover_rate']:>6.2f}%")
         if 'market_value' in result:
-            market_value = result['market_value'] / 100  # 转换为亿
-            subtitle_parts.append(f"市值: {market_value:>8.2f}亿")
+            subtitle_parts.append(f"市值: {result['market_value']:>8.2f}亿")
         if 'pe_ratio' in result:
-            pe = result['pe_ratio'] * 100
-            subtitle_parts.append(f"市盈: {pe:>6.2f}")
+            subtitle_parts.append(f"市盈: {result['pe_ratio']:>6.2f}")
 
     return {
         "title": title,
@@ -47,24 +48,34 @@ def format_security_info(result: Dict[str, Union[str, float]], is_fund: bool = F
         "valid": True
     }
 
-def query_securities(codes: List[str]) -> None:
-    """查询证券信息并以 workflow 格式输出"""
+def query_items(codes: List[str]) -> Dict:
+    """查询证券信息，返回 workflow 格式的结果"""
+    # 输入不是完整代码时，先从本地索引给出候选，不请求行情
+    suggestions = suggestion_items(codes)
+    if suggestions:
+        return {"items": suggestions}
+
     fund_utils = FundUtils()
     stock_utils = StockUtils()
 
     items = []
 
+    # 股票代码一次性批量查询，避免逐个请求
+    symbols = get_symbol_master()
+    stock_codes = [code for code in codes if (symbols.resolve(code) or {}).get('type') != 'fund']
+    stock_results = stock_utils.get_stock_infos(stock_codes, QUOTE_NAMES + ('pe_ratio',)) if stock_codes else {}
+
     # 处理所有代码
     for code in codes:
         try:
-            if code.startswith(('16', '50', '51', '52', '56', '58')):
-                result = fund_utils.get_fund_info(code)
+            if code in stock_results:
+                result = stock_results[code]
                 if 'error' not in result:
-                    items.append(format_security_info(result, is_fund=True))
+                    items.append(format_security_info(result))
             else:
-                result = stock_utils.get_stock_info(code)
+                result = fund_utils.get_fund_info(code)
                 if 'error' not in result:
-                    items.append(format_security_info(result))
+                    items.append(format_security_info(result, is_fund=True))
         except Exception as e:
             items.append({
                 "title": f"错误: {code}",
@@ -72,8 +83,11 @@ def query_securities(codes: List[str]) -> None:
                 "valid": False
             })
 
-    # 输出 workflow 格式的 JSON
-    print(json.dumps({"items": items}, ensure_ascii=False))
+    return {"items": items}
+
+def query_securities(codes: List[str]) -> None:
+    """查询证券信息并以 workflow 格式输出"""
+    print(json.dumps(query_items(codes), ensure_ascii=False))
 
 def main():
     if len(sys.argv) < 2:
@@ -86,6 +100,12 @@ def main():
         }))
         return
 
+    # 常驻查询服务运行时直接转发，否则在本进程内查询
+    output = forward('market_monitor', sys.argv[1:])
+    if output is not None:
+        sys.stdout.write(output)
+        return
+
     # 将输入的字符串按空格分割成多个代码
     codes = sys.argv[1].split()
     # codes = ['501311','600519','159949']
@@ -0,0 +1,49 @@
+import json
+import os
+import socket
+from typing import List, Optional
+
+# 连接常驻查询服务、等待服务确认收到请求的时限（秒），超时说明服务卡住，回退到本进程查询
+CONNECT_TIMEOUT = 0.2
+ACCEPT_TIMEOUT = 0.5
+# 服务确认后等待查询结果的时限，绘制多张图表时可能超过数秒，不应因此重复查询
+RESPONSE_TIMEOUT = 30.0
+
+
+def socket_path() -> str:
+    """常驻查询服务的Unix socket路径，可通过环境变量 STOCK_DAEMON_SOCKET 覆盖"""
+    path = os.environ.get('STOCK_DAEMON_SOCKET')
+    if path:
+        return path
+    # 与quote_cache.cache_dir一致，这里不导入以免客户端加载sqlite3
+    return os.path.join(os.path.expanduser('~'), '.cache', 'stock_workflow', 'query.sock')
+
+
+def request(message: dict, path: Optional[str] = None, timeout: float = RESPONSE_TIMEOUT) -> Optional[dict]:
+    """向常驻查询服务发送一行JSON请求，服务确认收到后等待JSON响应；服务未运行、未及时确认或出错时返回None"""
+    path = path or socket_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(path)
+            sock.settimeout(ACCEPT_TIMEOUT)
+            sock.sendall(json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n')
+            sock.shutdown(socket.SHUT_WR)
+            with sock.makefile('rb') as reader:
+                ack = json.loads(reader.readline().decode('utf-8'))
+                if not ack.get('accepted'):
+                    return ack
+                sock.settimeout(timeout)
+                return json.loads(reader.readline().decode('utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+def forward(command: str, argv: List[str], path: Optional[str] = None) -> Optional[str]:
+    """把命令行参数转发给常驻查询服务，返回应输出的文本；服务不可用时返回None，由调用方在本进程内查询"""
+    response = request({'command': command, 'argv': argv}, path)
+    if not response or not response.get('ok'):
+        return None
+    return response.get('output', '')
@@ -0,0 +1,149 @@
+"""常驻查询服务：在一个进程中保持连接池、行情缓存、证券码表和已预热的matplotlib，
+通过Unix socket为 stock_query.py / market_monitor.py 的命令行客户端提供查询
+
+用法: python query_daemon.py [--socket PATH] [--stop]
+"""
+import argparse
+import json
+import os
+import signal
+import socketserver
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from query_client import request, socket_path
+
+
+def _stock_query(argv: List[str]) -> Optional[Dict]:
+    import stock_query  # noqa: F401
+    return stock_query.query_items(argv)
+
+
+def _market_monitor(argv: List[str]) -> Optional[Dict]:
+    import market_monitor
+    return market_monitor.query_items(argv[0].split() if argv else [])
+
+
+# 命令名 -> 由命令行参数生成 Alfred JSON 的函数
+COMMANDS: Dict[str, Callable[[List[str]], Optional[Dict]]] = {
+    'stock_query': _stock_query,
+    'market_monitor': _market_monitor
+}
+
+def warm_up():
+    """预先导入绘图与数据依赖并渲染一张空图，使字体、后端等在首次查询前就已加载"""
+    import io
+
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+
+    import stock_query  # noqa: F401
+    import market_monitor  # noqa: F401
+    from http_client import get_http_client
+    from search_index import suggestion_items
+
+    plt.rcParams['font.sans-serif'] = ['PingFang HK', 'Microsoft YaHei']
+    plt.rcParams['axes.unicode_minus'] = False
+    fig = plt.figure(figsize=(15, 8))
+    fig.gca().plot([0, 1], [0, 1])
+    fig.gca().set_title('预热')
+    fig.savefig(io.BytesIO(), dpi=100, bbox_inches='tight')
+    plt.close(fig)
+
+    # 建立会话与连接池，加载码表与检索索引
+    get_http_client().session
+    suggestion_items(['gzmt'])
+
+
+class QueryHandler(socketserver.StreamRequestHandler):
+    """每个连接读取一行JSON请求 {"command", "argv"}，先回一行确认 {"accepted": true}，
+    查询完成后再返回一行JSON响应并关闭"""
+
+    def handle(self):
+        try:
+            message = json.loads(self.rfile.readline().decode('utf-8'))
+            self.wfile.write(b'{"accepted": true}\n')
+            self.wfile.flush()
+            response = self.server.dispatch(message)
+        except Exception as e:
+            response = {'ok': False, 'error': str(e)}
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+
+
+class QueryServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str):
+        super().__init__(path, QueryHandler)
+        self.path = path
+
+    def dispatch(self, message: Dict) -> Dict:
+        command = message.get('command')
+        if command == 'ping':
+            return {'ok': True, 'output': ''}
+        if command == 'shutdown':
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {'ok': True, 'output': ''}
+        if command not in COMMANDS:
+            return {'ok': False, 'error': f'未知命令: {command}'}
+
+        start = time.perf_counter()
+        argv = [str(arg) for arg in message.get('argv') or []]
+        # 绘图由stock_query在pyplot调用处加锁，行情请求等可并发进行
+        result = COMMANDS[command](argv)
+        print(f"{command} {' '.join(argv)}: {(time.perf_counter() - start) * 1000:.0f} ms", file=sys.stderr)
+        output = json.dumps(result, ensure_ascii=False) + '\n' if result else ''
+        return {'ok': True, 'output': output}
+
+
+def serve(path: Optional[str] = None) -> QueryServer:
+    """在path上监听，已有服务在运行时报错，遗留的socket文件直接删除"""
+    path = path or socket_path()
+    if os.path.exists(path):
+        if request({'command': 'ping'}, path, timeout=1.0) is not None:
+            raise RuntimeError(f'查询服务已在运行: {path}')
+        os.remove(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return QueryServer(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='常驻查询服务')
+    parser.add_argument('--socket', default=None, help='Unix socket路径')
+    parser.add_argument('--stop', action='store_true', help='停止正在运行的服务')
+    args = parser.parse_args()
+
+    if args.stop:
+        response = request({'command': 'shutdown'}, args.socket)
+        print('已停止' if response else '服务未运行')
+        return
+
+    start = time.perf_counter()
+    warm_up()
+    try:
+        server = serve(args.socket)
+    except RuntimeError as e:
+        print(str(e), file=sys.stderr)
+        sys.exit(1)
+    print(f"查询服务已启动: {server.path}（预热 {(time.perf_counter() - start) * 1000:.0f} ms）", file=sys.stderr)
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            os.remove(server.path)
+        except OSError:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, Optional, Sequence, Union
+
+from field_registry import LIST_FIELDS, STOCK_GET_FIELDS
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# 文本字段，其余均为float
+TEXT_FIELDS = ('code', 'name', 'currency')
+
+# 所有接口字段名称，加上基金估值衍生的字段
+QUOTE_FIELDS = tuple(dict.fromkeys(
+    TEXT_FIELDS + tuple(STOCK_GET_FIELDS.fields) + tuple(LIST_FIELDS.fields) + ('nav', 'premium_rate')
+))
+
+
+class Quote(Mapping):
+    """单只证券行情记录，__slots__存储；按只读字典访问，未请求的字段视为不存在"""
+
+    __slots__ = QUOTE_FIELDS
+
+    def __init__(self, **values):
+        for name, value in values.items():
+            setattr(self, name, value)
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> 'Quote':
+        """由字典构造，忽略不认识的键（如旧版本缓存中的字段）"""
+        quote = cls()
+        for name, value in data.items():
+            if name in QUOTE_FIELDS:
+                setattr(quote, name, value)
+        return quote
+
+    def __getitem__(self, name: str):
+        if name not in QUOTE_FIELDS:
+            raise KeyError(name)
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def __contains__(self, name) -> bool:
+        return name in QUOTE_FIELDS and hasattr(self, name)
+
+    def __iter__(self) -> Iterator[str]:
+        return (name for name in QUOTE_FIELDS if hasattr(self, name))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f'Quote({dict(self)!r})'
+
+
+class QuoteFrame(Mapping):
+    """批量行情的列式存储：每个字段一列NumPy数组，按代码索引；按代码访问时返回Quote视图"""
+
+    def __init__(self, codes: Sequence[str], columns: Dict[str, 'np.ndarray'],
+                 errors: Optional['np.ndarray'] = None):
+        # 只有批量结果用到NumPy，单只查询不加载
+        import numpy as np
+
+        self.codes = np.asarray(codes, dtype=object)
+        self.columns = columns
+        # 获取失败的代码记录错误信息，成功为空字符串
+        self.errors = errors if errors is not None else np.full(len(self.codes), '', dtype=object)
+        self._index: Optional[Dict[str, int]] = None
+
+    @property
+    def index(self) -> Dict[str, int]:
+        """代码 -> 行号，首次按代码访问时才建立"""
+        if self._index is None:
+            self._index = {code: i for i, code in enumerate(self.codes)}
+        return self._index
+
+    @classmethod
+    def from_records(cls, codes: Sequence[str], records: Mapping, fields: Iterable[str]) -> 'QuoteFrame':
+        """由 {代码: 行情字典} 构造，records中缺失的代码标记为获取失败"""
+        import numpy as np
+
+        names = list(dict.fromkeys(['code'] + list(fields) + ['currency']))
+        rows = [records.get(code) or {'error': '获取数据失败'} for code in codes]
+        columns = {}
+        for name in names:
+            if name in TEXT_FIELDS:
+                columns[name] = np.array([row.get(name, '') for row in rows], dtype=object)
+            else:
+                columns[name] = np.array([row.get(name, np.nan) for row in rows], dtype='float64')
+        errors = np.array([row.get('error', '') for row in rows], dtype=object)
+        return cls(codes, columns, errors)
+
+    def __getitem__(self, code: str) -> Union[Quote, Dict[str, str]]:
+        i = self.index[code]
+        if self.errors[i]:
+            return {'error': self.errors[i]}
+        quote = Quote()
+        for name, column in self.columns.items():
+            value = column[i]
+            setattr(quote, name, value if name in TEXT_FIELDS else float(value))
+        return quote
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.codes)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __contains__(self, code) -> bool:
+        return code in self.index
+
+    def column(self, name: str) -> 'np.ndarray':
+        return self.columns[name]
+
+    @property
+    def valid(self) -> 'np.ndarray':
+        """获取成功的行"""
+        return self.errors == ''
+
+    def take(self, indexer) -> 'QuoteFrame':
+        """按布尔掩码或位置数组选取行，返回新的QuoteFrame"""
+        return QuoteFrame(self.codes[indexer], {name: column[indexer] for name, column in self.columns.items()},
+                          self.errors[indexer])
+
+    def sort(self, by: str, descending: bool = False) -> 'QuoteFrame':
+        """按字段排序，NaN排在最后"""
+        import numpy as np
+
+        values = self.columns[by]
+        if values.dtype == object:
+            order = np.argsort(values.astype(str), kind='stable')
+            return self.take(order[::-1] if descending else order)
+        order = np.argsort(-values if descending else values, kind='stable')
+        return self.take(order)
+
+    def to_pandas(self):
+        import pandas as pd
+        return pd.DataFrame(dict(self.columns, error=self.errors), index=pd.Index(self.codes, name='code'))
+
+    def __repr__(self) -> str:
+        return f'QuoteFrame({len(self)} codes, fields={list(self.columns)})'
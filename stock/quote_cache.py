@@ -0,0 +1,137 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+# 各类字段的缓存有效期（秒）
+DEFAULT_TTLS = {
+    'quote': 5,         # 实时行情：价格、涨跌、成交
+    'fund_info': 5,     # 场内基金行情及估值
+    'static': 86400,    # 名称等静态信息
+    'fund_daily': 259200  # 按净值日缓存的基金数据，键中已含净值日，TTL仅用于清理
+}
+
+
+def cache_dir() -> str:
+    """本地缓存目录，可通过环境变量 STOCK_CACHE_DIR 覆盖"""
+    path = os.environ.get('STOCK_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'stock_workflow')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class QuoteCache:
+    """基于SQLite的跨进程行情缓存，按字段类别设置TTL，超出容量时按LRU淘汰"""
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 5000,
+                 ttls: Optional[Dict[str, float]] = None):
+        self.path = path or os.path.join(cache_dir(), 'quotes.db')
+        self.max_entries = max_entries
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS quotes ('
+            'key TEXT PRIMARY KEY, kind TEXT, value TEXT, fetched_at REAL, accessed_at REAL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_quotes_accessed ON quotes(accessed_at)')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS stats (kind TEXT PRIMARY KEY, hits INTEGER, misses INTEGER)'
+        )
+
+    def _record(self, kind: str, hits: int, misses: int):
+        self._conn.execute(
+            'INSERT INTO stats VALUES (?, ?, ?) ON CONFLICT(kind) DO UPDATE SET '
+            'hits = hits + excluded.hits, misses = misses + excluded.misses',
+            (kind, hits, misses)
+        )
+
+    def get_many(self, kind: str, keys: Iterable[str]) -> Dict[str, Dict]:
+        """批量读取未过期的缓存，返回命中的部分"""
+        keys = list(keys)
+        if not keys:
+            return {}
+        now = time.time()
+        deadline = now - self.ttls.get(kind, 0)
+        placeholders = ','.join('?' * len(keys))
+        with self._lock:
+            try:
+                rows = self._conn.execute(
+                    f'SELECT key, value FROM quotes WHERE kind = ? AND fetched_at >= ? AND key IN ({placeholders})',
+                    [kind, deadline] + keys
+                ).fetchall()
+                if rows:
+                    self._conn.execute(
+                        f'UPDATE quotes SET accessed_at = ? WHERE key IN ({",".join("?" * len(rows))})',
+                        [now] + [key for key, _ in rows]
+                    )
+                self._record(kind, len(rows), len(keys) - len(rows))
+            except sqlite3.Error:
+                return {}
+        return {key: json.loads(value) for key, value in rows}
+
+    def get(self, kind: str, key: str) -> Optional[Dict]:
+        return self.get_many(kind, [key]).get(key)
+
+    def put_many(self, kind: str, items: Dict[str, Dict]):
+        """写入缓存，超出容量时淘汰最久未访问的记录"""
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            try:
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO quotes VALUES (?, ?, ?, ?, ?)',
+                    [(key, kind, json.dumps(value, ensure_ascii=False), now, now) for key, value in items.items()]
+                )
+                self._conn.execute(
+                    'DELETE FROM quotes WHERE key IN ('
+                    'SELECT key FROM quotes ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+                    (self.max_entries,)
+                )
+            except sqlite3.Error:
+                pass
+
+    def put(self, kind: str, key: str, value: Dict):
+        self.put_many(kind, {key: value})
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """各字段类别的命中/未命中次数及命中率"""
+        with self._lock:
+            rows = self._conn.execute('SELECT kind, hits, misses FROM stats').fetchall()
+        return {
+            kind: {'hits': hits, 'misses': misses,
+                   'hit_rate': round(hits / (hits + misses), 4) if hits + misses else 0.0}
+            for kind, hits, misses in rows
+        }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM quotes')
+            self._conn.execute('DELETE FROM stats')
+
+
+_cache: Optional[QuoteCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_quote_cache() -> QuoteCache:
+    """获取进程内共享的QuoteCache"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = QuoteCache()
+    return _cache
+
+
+def main():
+    for kind, item in get_quote_cache().stats().items():
+        print(f"{kind}: 命中 {item['hits']} 未命中 {item['misses']} 命中率 {item['hit_rate']:.2%}")
+
+
+if __name__ == "__main__":
+    main()
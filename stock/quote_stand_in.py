@@ -0,0 +1,162 @@
+"""本地行情接口替身服务，模拟东方财富 ulist.np/get 批量接口与 stock/get 单只接口，
+同一证券在两个接口中返回相同的行情，用于离线核对批量查询与逐只查询的结果
+
+代码末三位为999的证券视为不存在，末三位为998的视为停牌（数值字段返回'-'）
+
+用法: python quote_stand_in.py [端口] [--check [代码 ...]]
+    --check  以替身服务作为HTTP代理，比较StockUtils.get_stock_infos与逐只查询的结果后退出
+"""
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs, urlparse
+
+from field_registry import LIST_FIELDS, QUOTE_NAMES, STOCK_GET_FIELDS, FieldRegistry
+
+# 默认核对的代码：沪深A股、港股、停牌、不存在及重复代码
+CHECK_CODES = ['600519', '000001', '300750', '00700', '600998', '600999', '600519']
+
+
+def _quote(secid: str) -> Dict:
+    """按secid生成固定的一组行情（接口原始单位），不存在时返回None"""
+    market, code = secid.split('.', 1)
+    if code.endswith('999'):
+        return None
+    quote = {'code': code, 'market': int(market), 'name': f'替身{code}'}
+    if code.endswith('998'):
+        return quote
+
+    rng = random.Random(zlib.crc32(secid.encode()))
+    pre_close = round(rng.uniform(5, 500), 2)
+    price = round(pre_close * (1 + rng.uniform(-0.1, 0.1)), 2)
+    volume = rng.randint(10 ** 4, 10 ** 8)  # 手
+    shares = rng.randint(10 ** 8, 10 ** 10)
+    quote.update({
+        'price': price,
+        'change': round(price - pre_close, 2),
+        'change_percent': round((price / pre_close - 1) * 100, 2),
+        'open': round(pre_close * (1 + rng.uniform(-0.02, 0.02)), 2),
+        'high': round(max(price, pre_close) * (1 + rng.uniform(0, 0.03)), 2),
+        'low': round(min(price, pre_close) * (1 - rng.uniform(0, 0.03)), 2),
+        'pre_close': pre_close,
+        'volume': volume,
+        'amount': round(volume * 100 * price, 2),
+        'turnover_rate': round(volume * 100 / shares * 100, 2),
+        'volume_ratio': round(rng.uniform(0.3, 3), 2),
+        'pe_ratio': round(rng.uniform(5, 80), 2),
+        'pb_ratio': round(rng.uniform(0.5, 15), 2),
+        'market_value': round(shares * price, 2),
+        'float_market_value': round(shares * price * 0.8, 2),
+        'updated_at': int(time.time())
+    })
+    return quote
+
+
+def _row(registry: FieldRegistry, quote: Dict, keys: List[str]) -> Dict:
+    """按请求的fNN取出一行，行情中没有的字段与停牌时一样返回'-'"""
+    names = {field.key: name for name, field in registry.fields.items()}
+    return {key: quote.get(names.get(key), '-') for key in keys}
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        # 作为HTTP代理时path为完整URL，urlparse同样适用
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        keys = [f for f in query.get('fields', [''])[0].split(',') if f]
+
+        if url.path.endswith('/ulist.np/get'):
+            secids = [s for s in query.get('secids', [''])[0].split(',') if s]
+            quotes = [quote for quote in map(_quote, secids) if quote]
+            # np=1时diff为列表，否则为以序号为键的字典
+            diff = [_row(LIST_FIELDS, quote, ['f12', 'f13'] + keys) for quote in quotes]
+            if query.get('np', ['0'])[0] != '1':
+                diff = {str(i): row for i, row in enumerate(diff)}
+            self._send_json({'rc': 0, 'data': {'total': len(quotes), 'diff': diff} if quotes else None})
+        elif url.path.endswith('/stock/get'):
+            quote = _quote(query.get('secid', [''])[0])
+            self._send_json({'rc': 0, 'data': _row(STOCK_GET_FIELDS, quote, keys) if quote else None})
+        else:
+            self.send_error(404)
+
+    def _send_json(self, message: Dict):
+        body = json.dumps(message, ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(port: int = 8766) -> ThreadingHTTPServer:
+    """在后台线程启动替身服务并返回server，调用server.shutdown()停止"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _same(a, b) -> bool:
+    if isinstance(a, float) or isinstance(b, float):
+        return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+    return a == b
+
+
+def check(port: int, codes: List[str]) -> int:
+    """经替身服务分别批量与逐只查询，返回结果不一致的代码数"""
+    proxy = f'http://127.0.0.1:{port}'
+    os.environ.update({'HTTP_PROXY': proxy, 'http_proxy': proxy, 'NO_PROXY': '', 'no_proxy': ''})
+    # 使用空的缓存目录，避免读到真实行情缓存；码表构建失败时按代码前缀推断市场
+    os.environ['STOCK_CACHE_DIR'] = tempfile.mkdtemp(prefix='quote_stand_in_')
+    from stock_utils import StockUtils
+
+    stock_utils = StockUtils(use_watchlist=False)
+    frame = stock_utils.get_stock_infos(codes, QUOTE_NAMES)
+    mismatched = 0
+    for code in dict.fromkeys(codes):
+        batch = dict(frame[code])
+        single = stock_utils._fetch_stock_info(code, QUOTE_NAMES)
+        if 'error' in batch or 'error' in single:
+            ok = 'error' in batch and 'error' in single
+            diffs = [] if ok else [f"批量={batch.get('error', '成功')} 逐只={single.get('error', '成功')}"]
+        else:
+            diffs = [f'{name}: 批量={batch.get(name)!r} 逐只={single.get(name)!r}'
+                     for name in QUOTE_NAMES + ('currency',) if not _same(batch.get(name), single.get(name))]
+        mismatched += bool(diffs)
+        print(f"{code}: {'不一致 ' + '; '.join(diffs) if diffs else '一致'}")
+    return mismatched
+
+
+def main():
+    args = sys.argv[1:]
+    port = int(args[0]) if args and args[0].isdigit() else 8766
+    server = serve(port)
+    if '--check' in args:
+        codes = args[args.index('--check') + 1:] or CHECK_CODES
+        mismatched = check(port, codes)
+        server.shutdown()
+        print(f"{len(set(codes))}个代码中{mismatched}个结果不一致")
+        sys.exit(1 if mismatched else 0)
+
+    print(f"行情接口替身服务: http://127.0.0.1:{port}/api/qt/ulist.np/get，可作为HTTP代理使用")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
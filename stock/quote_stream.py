@@ -0,0 +1,168 @@
+import json
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+from http_client import HttpClient, get_http_client
+from field_registry import LIST_FIELDS
+
+SSE_URL = 'http://push2.eastmoney.com/api/qt/ulist/sse'
+POLL_URL = 'http://push2.eastmoney.com/api/qt/ulist.np/get'
+
+# 默认订阅字段，名称见字段注册表
+DEFAULT_FIELDS = ('price', 'change_percent', 'change', 'volume', 'amount', 'turnover_rate',
+                  'high', 'low', 'open', 'pre_close')
+# 用于定位证券的字段，总是随订阅一起请求
+KEY_FIELDS = ('code', 'market')
+
+STREAM_READ_TIMEOUT = 30  # 推送连接无数据超过该时长视为断线（秒）
+MAX_BACKOFF = 30  # 重连最大等待时间（秒）
+
+
+class QuoteSubscription:
+    """行情订阅：维持一条推送长连接，只回调发生变化的字段；连续失败时退回批量轮询"""
+
+    def __init__(self, secids: Dict[str, str], fields: Iterable[str],
+                 callback: Callable[[str, Dict], None], http: Optional[HttpClient] = None,
+                 headers: Optional[Dict] = None, poll_interval: float = 3.0, max_failures: int = 3,
+                 retry_stream: float = 60.0, url: str = SSE_URL, poll_url: str = POLL_URL):
+        self.secids = secids  # secid -> 代码
+        self.fields = [field for field in fields if field not in KEY_FIELDS]
+        self.callback = callback
+        self.http = http or get_http_client()
+        self.headers = headers
+        self.poll_interval = poll_interval
+        self.max_failures = max_failures
+        self.retry_stream = retry_stream
+        self.url = url
+        self.poll_url = poll_url
+        self.mode = 'connecting'  # connecting / stream / poll
+
+        self._state: Dict[str, Dict] = {}  # secid -> 已知字段值
+        self._positions: Dict[str, str] = {}  # 推送消息中的序号 -> secid
+        self._stopped = threading.Event()
+        self._response = None
+        self._thread = threading.Thread(target=self._run, name='quote-subscription', daemon=True)
+
+    def start(self) -> 'QuoteSubscription':
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        """停止订阅并关闭连接"""
+        self._stopped.set()
+        response = self._response
+        if response is not None:
+            try:
+                response.close()
+            except Exception:
+                pass
+        if self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self._thread.join(timeout)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """当前已知的完整行情：代码 -> 字段"""
+        return {self.secids[secid]: dict(fields) for secid, fields in self._state.items()}
+
+    def _params(self) -> Dict:
+        return {
+            'ut': 'fa5fd1943c7b386f172d6893dbfba10b',
+            'invt': 2,
+            'fltt': 2,
+            'np': 1,
+            'fields': LIST_FIELDS.keys(KEY_FIELDS + tuple(self.fields)),
+            'secids': ','.join(self.secids)
+        }
+
+    def _run(self):
+        failures = 0
+        stream_retry_at = 0.0
+        while not self._stopped.is_set():
+            if time.monotonic() >= stream_retry_at:
+                received = False
+                try:
+                    received = self._stream()
+                except Exception as e:
+                    if not self._stopped.is_set():
+                        print(f"行情推送连接中断: {str(e)}", file=sys.stderr)
+                if self._stopped.is_set():
+                    break
+
+                failures = 0 if received else failures + 1
+                if failures >= self.max_failures:
+                    # 推送不可用，改为轮询，过一段时间再尝试恢复推送
+                    failures = 0
+                    stream_retry_at = time.monotonic() + self.retry_stream
+                    self.mode = 'poll'
+                else:
+                    self._stopped.wait(min(2 ** failures, MAX_BACKOFF) if failures else 0.5)
+                continue
+
+            try:
+                self._poll()
+            except Exception as e:
+                print(f"轮询行情失败: {str(e)}", file=sys.stderr)
+            self._stopped.wait(self.poll_interval)
+
+    def _stream(self) -> bool:
+        """读取推送流直到断开，返回是否收到过数据"""
+        params = dict(self._params(), mpi=1000)
+        received = False
+        with self.http.get(self.url, params=params, headers=self.headers, stream=True,
+                           timeout=(3.05, STREAM_READ_TIMEOUT)) as response:
+            response.raise_for_status()
+            self._response = response
+            try:
+                for line in response.iter_lines(decode_unicode=True):
+                    if self._stopped.is_set():
+                        break
+                    if not line or not line.startswith('data:'):
+                        continue
+                    message = json.loads(line[5:])
+                    received = True
+                    self.mode = 'stream'
+                    self._handle_message(message)
+            finally:
+                self._response = None
+        return received
+
+    def _handle_message(self, message: Dict):
+        """全量消息重建序号映射，增量消息按序号合并变化字段"""
+        data = message.get('data') or {}
+        diff = data.get('diff') or {}
+        if isinstance(diff, list):
+            diff = {str(i): row for i, row in enumerate(diff)}
+
+        if message.get('full') == 1:
+            self._positions = {}
+        for position, row in diff.items():
+            if 'f12' in row and 'f13' in row:
+                self._positions[position] = f"{row['f13']}.{row['f12']}"
+            secid = self._positions.get(position)
+            if secid in self.secids:
+                self._emit(secid, row)
+
+    def _poll(self):
+        """批量请求一次全部订阅代码"""
+        response = self.http.get(self.poll_url, params=self._params(), headers=self.headers)
+        diff = (response.json().get('data') or {}).get('diff') or []
+        if isinstance(diff, dict):
+            diff = list(diff.values())
+        for row in diff:
+            secid = f"{row.get('f13')}.{row.get('f12')}"
+            if secid in self.secids:
+                self._emit(secid, row)
+
+    def _emit(self, secid: str, row: Dict):
+        """按字段注册表换算后与已知状态比较，只把变化的字段交给回调"""
+        state = self._state.setdefault(secid, {})
+        values = LIST_FIELDS.parse(row, self.fields, fill_missing=False)
+        delta = {name: value for name, value in values.items() if state.get(name, object()) != value}
+        if not delta:
+            return
+        state.update(delta)
+        try:
+            self.callback(self.secids[secid], delta)
+        except Exception as e:
+            print(f"行情回调出错: {str(e)}", file=sys.stderr)
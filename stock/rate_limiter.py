@@ -0,0 +1,31 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """令牌桶限流器：平均每秒rate个请求，允许burst个突发"""
+
+    def __init__(self, rate: float = 10.0, burst: int = 5):
+        if rate <= 0 or burst <= 0:
+            raise ValueError('rate和burst必须大于0')
+        self.rate = rate
+        self.capacity = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self, tokens: float = 1.0):
+        """阻塞直到获得令牌"""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
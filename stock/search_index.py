@@ -0,0 +1,204 @@
+import os
+import pickle
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+from symbol_master import SymbolMaster, get_symbol_master, guess_symbol
+from trading_calendar import trading_date
+
+
+def pinyin_initials(name: str) -> str:
+    """名称的拼音首字母，如 贵州茅台 -> gzmt；pypinyin只在重建索引时导入"""
+    if not name:
+        return ''
+    try:
+        from pypinyin import Style, lazy_pinyin
+    except ImportError:  # 未安装pypinyin时不支持拼音首字母检索
+        return ''
+    return ''.join(lazy_pinyin(name, style=Style.FIRST_LETTER, errors='ignore')).lower()
+
+
+class _Lines:
+    """以换行拼接的字符串列，按偏移量随机访问，加载时无需整体split"""
+
+    def __init__(self, text: str, offsets: bytes):
+        self.text = text
+        self.offsets = array('I')
+        self.offsets.frombytes(offsets)
+
+    @staticmethod
+    def pack(lines: List[str]) -> Tuple[str, bytes]:
+        offsets = array('I', [0])
+        for line in lines:
+            offsets.append(offsets[-1] + len(line) + 1)
+        return ''.join(line + '\n' for line in lines), offsets.tobytes()
+
+    def __len__(self) -> int:
+        return max(0, len(self.offsets) - 1)
+
+    def __getitem__(self, i: int) -> str:
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.text[self.offsets[i]:self.offsets[i + 1] - 1]
+
+
+class SearchIndex:
+    """证券前缀检索索引：代码、名称、拼音首字母，排序数组+二分查找"""
+
+    COLUMNS = ('keys', 'codes', 'symbol_codes', 'symbol_infos')
+
+    def __init__(self, master: Optional[SymbolMaster] = None, path: Optional[str] = None):
+        self.master = master or get_symbol_master()
+        self.path = path or os.path.join(os.path.dirname(self.master.path), 'search_index.pkl')
+        self._columns: Optional[Dict[str, _Lines]] = None
+        self._version = ''
+        self._lock = threading.Lock()
+
+    def _is_current(self, today: str) -> bool:
+        """已加载的索引是当前交易日的，或与码表版本一致（码表重建失败时沿用）"""
+        return self._columns is not None and self._version in (today, self.master.version())
+
+    def _load(self) -> Dict[str, _Lines]:
+        # 当天的索引直接使用；常驻进程跨日后随码表重新加载或重建
+        today = trading_date()
+        if self._columns is not None and self._version == today:
+            return self._columns
+        with self._lock:
+            if self._is_current(today):
+                return self._columns
+            # 当天的索引自带码表数据，直接使用，不再解析码表文件
+            data = {}
+            try:
+                with open(self.path, 'rb') as f:
+                    data = pickle.load(f)
+            except (OSError, pickle.PickleError, EOFError):
+                pass
+            if not data or (data['version'] != today and data['version'] != self.master.version()):
+                data = self._build()
+                self._save(data)
+
+            self._columns = {name: _Lines(*data[name]) for name in self.COLUMNS}
+            self._version = data['version']
+            return self._columns
+
+    def _build(self) -> Dict:
+        """由证券码表生成 (检索键, 代码) 的排序数组及按代码排序的码表"""
+        symbols = self.master.symbols()
+        entries = set()
+        for code, (_, kind, name) in symbols.items():
+            entries.add((code, code))
+            if kind == 'hk':
+                entries.add((code.lstrip('0'), code))  # 港股支持省略前导0
+            if name:
+                entries.add((name.lower(), code))
+                initials = pinyin_initials(name)
+                if initials:
+                    entries.add((initials, code))
+        entries = sorted(entries)
+        symbol_codes = sorted(symbols)
+        return {
+            'version': self.master.version(),
+            'keys': _Lines.pack([key for key, _ in entries]),
+            'codes': _Lines.pack([code for _, code in entries]),
+            'symbol_codes': _Lines.pack(symbol_codes),
+            'symbol_infos': _Lines.pack(['\t'.join(symbols[code]) for code in symbol_codes])
+        }
+
+    def _save(self, data: Dict):
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp, 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, str]]:
+        """按前缀检索，返回码表条目列表，完全匹配的排在前面"""
+        query = query.strip().lower()
+        if not query:
+            return []
+        columns = self._load()
+        keys, codes = columns['keys'], columns['codes']
+
+        exact, prefix = [], []
+        seen = set()
+        i = bisect_left(keys, query)
+        while i < len(keys):
+            key = keys[i]
+            if not key.startswith(query):
+                break
+            code = codes[i]
+            if code not in seen:
+                seen.add(code)
+                (exact if key == query else prefix).append(code)
+                if len(seen) >= limit * 5:  # 候选足够多时提前结束
+                    break
+            i += 1
+
+        return [self.lookup(code) for code in (exact + prefix)[:limit]]
+
+    def lookup(self, code: str) -> Optional[Dict[str, str]]:
+        """按完整代码查询，未收录返回None"""
+        columns = self._load()
+        symbol_codes = columns['symbol_codes']
+        i = bisect_left(symbol_codes, code)
+        if i == len(symbol_codes) or symbol_codes[i] != code:
+            return None
+        secid, kind, name = columns['symbol_infos'][i].split('\t')
+        return {'code': code, 'secid': secid, 'market': secid.split('.', 1)[0], 'type': kind, 'name': name}
+
+    def is_complete_code(self, code: str) -> bool:
+        """输入是否为完整代码：码表中收录，或是码表中没有以其开头的更长代码、可按前缀推断市场的5/6位数字
+
+        可转债、REITs、指数等不在码表分组内，交由行情接口查询；输入到一半的代码（如60051）仍按前缀搜索
+        """
+        if self.lookup(code) is not None:
+            return True
+        if len(code) not in (5, 6) or guess_symbol(code) is None:
+            return False
+        symbol_codes = self._load()['symbol_codes']
+        i = bisect_left(symbol_codes, code)
+        return i == len(symbol_codes) or not symbol_codes[i].startswith(code)
+
+
+_index: Optional[SearchIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    """获取进程内共享的SearchIndex，常驻服务中索引只在跨交易日时重新加载"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SearchIndex()
+    return _index
+
+
+def suggestion_items(tokens: List[str], limit: int = 10) -> List[Dict]:
+    """为第一个不完整的输入生成 Alfred 候选项，选中后补全为证券代码"""
+    index = get_search_index()
+    for pos, token in enumerate(tokens):
+        if index.is_complete_code(token):
+            continue
+        items = []
+        for symbol in index.search(token, limit):
+            completed = tokens[:pos] + [symbol['code']] + tokens[pos + 1:]
+            items.append({
+                "title": f"{symbol['name']} ({symbol['code']})",
+                "subtitle": "按 Tab 补全代码",
+                "autocomplete": ' '.join(completed) + ' ',
+                "arg": symbol['code'],
+                "valid": False
+            })
+        if not items:
+            items.append({
+                "title": f"未找到匹配 {token} 的证券",
+                "subtitle": "支持代码、名称或拼音首字母",
+                "valid": False
+            })
+        return items
+    return []
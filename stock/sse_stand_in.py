@@ -0,0 +1,114 @@
+"""本地行情推送替身服务，模拟东方财富 ulist/sse 与 ulist.np/get，用于离线调试订阅
+
+用法: python sse_stand_in.py [端口] [--drop-after N]
+    --drop-after N  每条推送连接发送N条消息后主动断开，用于验证自动重连
+    --no-stream     推送接口返回503，用于验证轮询降级
+"""
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+_prices = {}
+_lock = threading.Lock()
+
+
+def _row(secid: str, fields):
+    """按secid生成一条行情，价格做随机游走"""
+    market, code = secid.split('.', 1)
+    with _lock:
+        price = _prices.setdefault(secid, 10.0)
+        if random.random() < 0.5:
+            price = round(max(0.01, price + random.choice((-0.01, 0.01))), 2)
+            _prices[secid] = price
+    values = {'f2': price, 'f3': round((price / 10.0 - 1) * 100, 2), 'f4': round(price - 10.0, 2),
+              'f5': int(time.time()) % 100000, 'f6': round(price * 1000, 2), 'f8': 0.5,
+              'f15': max(price, 10.0), 'f16': min(price, 10.0), 'f17': 10.0, 'f18': 10.0}
+    row = {'f12': code, 'f13': int(market)}
+    row.update({field: values.get(field, '-') for field in fields if field not in row})
+    return row
+
+
+class Handler(BaseHTTPRequestHandler):
+    drop_after = 0
+    no_stream = False
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        secids = [s for s in query.get('secids', [''])[0].split(',') if s]
+        fields = [f for f in query.get('fields', [''])[0].split(',') if f]
+
+        if url.path.endswith('/ulist.np/get'):
+            body = json.dumps({'rc': 0, 'data': {'total': len(secids),
+                                                 'diff': [_row(secid, fields) for secid in secids]}})
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body.encode())
+            return
+
+        if not url.path.endswith('/ulist/sse') or self.no_stream:
+            self.send_error(503 if self.no_stream else 404)
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        # 首条为全量，之后只推送变化的字段，序号对应secids中的位置
+        last = {str(i): _row(secid, fields) for i, secid in enumerate(secids)}
+        messages = [{'rc': 0, 'full': 1, 'data': {'total': len(secids), 'diff': last}}]
+        sent = 0
+        try:
+            while True:
+                for message in messages:
+                    self.wfile.write(f"data: {json.dumps(message)}\n\n".encode())
+                    self.wfile.flush()
+                    sent += 1
+                    if self.drop_after and sent >= self.drop_after:
+                        return
+                time.sleep(0.2)
+                diff = {}
+                for i, secid in enumerate(secids):
+                    row = _row(secid, fields)
+                    changed = {k: v for k, v in row.items() if k not in ('f12', 'f13') and last[str(i)].get(k) != v}
+                    if changed:
+                        diff[str(i)] = changed
+                        last[str(i)] = row
+                messages = [{'rc': 0, 'full': 0, 'data': {'diff': diff}}] if diff else []
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def serve(port: int = 8765, drop_after: int = 0, no_stream: bool = False) -> ThreadingHTTPServer:
+    """在后台线程启动替身服务并返回server，调用server.shutdown()停止"""
+    Handler.drop_after = drop_after
+    Handler.no_stream = no_stream
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    args = sys.argv[1:]
+    port = int(args[0]) if args and args[0].isdigit() else 8765
+    drop_after = int(args[args.index('--drop-after') + 1]) if '--drop-after' in args else 0
+    server = serve(port, drop_after, '--no-stream' in args)
+    print(f"行情推送替身服务: http://127.0.0.1:{port}/api/qt/ulist/sse")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
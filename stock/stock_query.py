@@ -1,26 +1,31 @@
-from stock_utils import StockUtils
+from stock_utils import MAX_TIMELINE_DAYS, StockUtils
 from fund_utils import FundUtils
+from symbol_master import get_symbol_master
+from search_index import suggestion_items
+from chart_cache import ChartCache
+from downsample import downsample_frame
+from chart_output import DEFAULT_PNG, PREVIEW_PNG, PngOptions, figure_png, stream_base64
+from query_client import forward
 import sys
-from typing import Dict, Union, List, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Dict, Union, List, Any, Optional
 from datetime import datetime, timedelta
-import mplfinance as mpf
-import pandas as pd
 import os
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
 import base64
 import json
-import numpy as np
+
+# matplotlib/pandas/numpy只在绘图时导入，纯文本查询不加载
+if TYPE_CHECKING:
+    import pandas as pd
+
+# pyplot的全局状态不是线程安全的，常驻服务中并发查询在本进程内的绘图串行执行
+_pyplot_lock = threading.Lock()
 
 def is_fund_code(code: str) -> bool:
-    """判断是否为基金代码"""
-    # LOF基金: 16xxxx, 501xxx
-    # ETF基金: 51xxxx, 52xxxx, 56xxxx, 58xxxx
-    # 货币ETF: 511xxx
-    # 债券ETF: 511xxx, 512xxx
-    # 股票ETF: 510xxx, 512xxx, 513xxx, 515xxx, 516xxx, 588xxx
-    fund_prefixes = ('16', '50', '51', '52', '56', '58')
-    return code.startswith(fund_prefixes)
+    """判断是否为基金代码（LOF/ETF），以证券码表为准"""
+    symbol = get_symbol_master().resolve(code)
+    return symbol is not None and symbol['type'] == 'fund'
 
 def format_fund_info(result: Dict[str, Union[str, float]]) -> str:
     """格式化基金信息输出"""
@@ -48,9 +53,7 @@ def format_stock_info(result: Dict[str, Union[str, float]]) -> str:
 
     # 添加成交信息（如果有）
     if 'volume' in result:
-        volume = result['volume'] / 10000  # 转换为万股
-        amount = result['amount']  # 已经是万元
-        info += f"成交量: {volume:.2f}万股 成交额: {amount:.2f}万{currency} "
+        info += f"成交量: {result['volume']:.2f}万手 成交额: {result['amount']:.2f}万{currency} "
 
     # 添加最高最低价（如果有）
     if 'high' in result:
@@ -66,8 +69,39 @@ def format_stock_info(result: Dict[str, Union[str, float]]) -> str:
 
     return info
 
-def plot_kline(code: str, data: pd.DataFrame, stock_info: Dict[str, Any]) -> None:
-    """绘制K线图并保存"""
+def kline_key(code: str, data: 'pd.DataFrame', stock_info: Dict[str, Any],
+              options: PngOptions = DEFAULT_PNG) -> str:
+    """K线图的缓存键，每只证券、每份数据、每种输出参数各自对应一个文件"""
+    return ChartCache.key(code, data, 'kline', (15, 8, options.tag()), (
+        stock_info['name'], stock_info['price'], stock_info['pre_close'], datetime.now().strftime('%Y-%m-%d')
+    ))
+
+def plot_kline(code: str, data: 'pd.DataFrame', stock_info: Dict[str, Any],
+               cache: Optional[ChartCache] = None, options: PngOptions = DEFAULT_PNG) -> str:
+    """绘制K线图并保存，数据未变化时直接复用已有图片，返回图片路径"""
+    cache = cache or ChartCache()
+    key = kline_key(code, data, stock_info, options)
+    cached = cache.get(key, 'kline')
+    if cached:
+        return cached
+    with _pyplot_lock:
+        png = render_kline(code, data, stock_info, options)
+    return cache.put(key, png, 'kline')
+
+def render_kline(code: str, data: 'pd.DataFrame', stock_info: Dict[str, Any], options: PngOptions = DEFAULT_PNG) -> bytes:
+    """绘制K线图，返回内存中的PNG数据，不写文件"""
+    import numpy as np
+    import pandas as pd
+    import matplotlib.pyplot as plt
+    import matplotlib.dates as mdates
+    from matplotlib.collections import LineCollection
+
+    # 只对多日分时按LTTB降到几百个点，保留走势形状；单日（含港股约330点）按原数据绘制
+    days = data.index.normalize().unique()
+    multi_day = len(days) > 1
+    if multi_day:
+        data = downsample_frame(data)
+
     # 设置中文字体
     plt.rcParams['font.sans-serif'] = ['PingFang HK', 'Microsoft YaHei']
     plt.rcParams['axes.unicode_minus'] = False
@@ -138,16 +172,25 @@ def plot_kline(code: str, data: pd.DataFrame, stock_info: Dict[str, Any]) -> Non
     ax2.set_yticklabels([])
 
     # 绘制价格线（根据涨跌设置颜色，并添加轻微透明度）
-    price_color = ['red' if p >= pre_close else 'green' for p in data['price']]
-    for i in range(1, len(data['price'])):
-        ax1.plot(data.index[i-1:i+1], data['price'].iloc[i-1:i+1],
-                 color=price_color[i], linewidth=1.2, alpha=0.9)
+    # 所有分钟线段放在一个LineCollection中，每段颜色取该段终点相对昨收的涨跌
+    # 多日分时按序号排列，去掉隔夜与午休的空档
+    x = np.arange(len(data), dtype=float) if multi_day else mdates.date2num(data.index.to_pydatetime())
+    prices = data['price'].to_numpy(dtype=float)
+    points = np.column_stack([x, prices])
+    segments = np.stack([points[:-1], points[1:]], axis=1)
+    price_color = np.where(prices[1:] >= pre_close, 'red', 'green')
+    if not multi_day:
+        ax1.xaxis_date()
+    ax1.add_collection(LineCollection(segments, colors=price_color, linewidths=1.2, alpha=0.9,
+                                      capstyle='projecting', joinstyle='round'))
+    ax1.autoscale_view()
 
     # 添加昨收价参考线（使用更细的虚线）
     ax1.axhline(y=pre_close, color='gray', linestyle='--', alpha=0.4, linewidth=0.8)
 
     # 设置标题
-    ax1.set_title(f"{stock_info['name']} ({code}) 分时图 - {datetime.now().strftime('%Y-%m-%d')} 涨跌幅: {change:.2f}%")
+    period = f"{days[0]:%Y-%m-%d}~{days[-1]:%Y-%m-%d}" if multi_day else datetime.now().strftime('%Y-%m-%d')
+    ax1.set_title(f"{stock_info['name']} ({code}) 分时图 - {period} 涨跌幅: {change:.2f}%")
 
     # 设置左侧Y轴（价格）
     ax1.set_ylabel('价格(元)')
@@ -162,73 +205,97 @@ def plot_kline(code: str, data: pd.DataFrame, stock_info: Dict[str, Any]) -> Non
     # 将成交额转换为千万元单位
     amount_in_10m = data['amount'] / 1000
 
-    # 绘制成交额柱状图（东方财富风格）
-    for i in range(len(amount_in_10m)):
-        if i > 0:
-            color = 'red' if data['price'].iloc[i] > data['price'].iloc[i-1] else 'green'
-        else:
-            color = 'red' if data['price'].iloc[i] > pre_close else 'green'
-        ax3.bar(data.index[i], amount_in_10m.iloc[i], color=color, alpha=0.7, width=0.0003)
+    # 绘制成交额柱状图（东方财富风格），一次bar调用，颜色按与前一分钟价格比较
+    previous = np.concatenate([[pre_close], prices[:-1]])
+    bar_color = np.where(prices > previous, 'red', 'green')
+    if multi_day:
+        ax3.bar(x, amount_in_10m.to_numpy(), color=bar_color, alpha=0.7, width=0.8)
+    else:
+        ax3.bar(data.index, amount_in_10m.to_numpy(), color=bar_color, alpha=0.7, width=0.0003)
 
     # 设置成交量图样式
     ax3.grid(True, linestyle='--', alpha=0.3)
     ax3.set_ylabel('成交额(千万元)')
     ax3.set_facecolor('#F6F6F6')
 
-    # 设置x轴时间范围和格式
-    today = pd.Timestamp.now().date()
-    xlim_min = pd.Timestamp.combine(today, pd.Timestamp('09:30:00').time())
-    xlim_max = pd.Timestamp.combine(today, pd.Timestamp('15:00:00').time())
-
-    ax1.set_xlim(xlim_min, xlim_max)
-    ax3.set_xlim(xlim_min, xlim_max)
-
-    # 设置x轴时间格式
-    time_formatter = mdates.DateFormatter('%H:%M')
-    ax1.xaxis.set_major_formatter(time_formatter)
-    ax3.xaxis.set_major_formatter(time_formatter)
-
-    # 创建固定的时间刻度
-    trading_hours = [
-        pd.Timestamp.combine(today, pd.Timestamp(f'{h:02d}:{m:02d}:00').time())
-        for h in [9, 10, 11, 13, 14, 15]
-        for m in [0, 30] if not (h == 9 and m == 0) and not (h == 15 and m == 30)
-    ]
-    trading_hours.insert(0, xlim_min)  # 添加9:30
-
-    # 设置刻度
-    ax1.set_xticks(trading_hours)
-    ax3.set_xticks(trading_hours)
-
-    # 添加中午休市时段的灰色背景
-    lunch_start = pd.Timestamp.combine(today, pd.Timestamp('11:30:00').time())
-    lunch_end = pd.Timestamp.combine(today, pd.Timestamp('13:00:00').time())
-
-    ax1.axvspan(lunch_start, lunch_end, color='gray', alpha=0.1)
-    ax3.axvspan(lunch_start, lunch_end, color='gray', alpha=0.1)
+    if multi_day:
+        # 每个交易日的首个点标注日期，日与日之间画分隔线
+        starts = np.flatnonzero(np.r_[True, data.index.date[1:] != data.index.date[:-1]])
+        for ax in (ax1, ax3):
+            ax.set_xlim(-0.5, len(data) - 0.5)
+            ax.set_xticks(starts)
+            ax.set_xticklabels([f'{data.index[i]:%m-%d}' for i in starts])
+            for start in starts[1:]:
+                ax.axvline(start - 0.5, color='gray', alpha=0.3, linewidth=0.8)
+    else:
+        # 设置x轴时间范围和格式
+        today = data.index[-1].date()
+        xlim_min = pd.Timestamp.combine(today, pd.Timestamp('09:30:00').time())
+        xlim_max = pd.Timestamp.combine(today, pd.Timestamp('15:00:00').time())
+
+        ax1.set_xlim(xlim_min, xlim_max)
+        ax3.set_xlim(xlim_min, xlim_max)
+
+        # 设置x轴时间格式
+        time_formatter = mdates.DateFormatter('%H:%M')
+        ax1.xaxis.set_major_formatter(time_formatter)
+        ax3.xaxis.set_major_formatter(time_formatter)
+
+        # 创建固定的时间刻度
+        trading_hours = [
+            pd.Timestamp.combine(today, pd.Timestamp(f'{h:02d}:{m:02d}:00').time())
+            for h in [9, 10, 11, 13, 14, 15]
+            for m in [0, 30] if not (h == 9 and m == 0) and not (h == 15 and m == 30)
+        ]
+        trading_hours.insert(0, xlim_min)  # 添加9:30
+
+        # 设置刻度
+        ax1.set_xticks(trading_hours)
+        ax3.set_xticks(trading_hours)
+
+        # 添加中午休市时段的灰色背景
+        lunch_start = pd.Timestamp.combine(today, pd.Timestamp('11:30:00').time())
+        lunch_end = pd.Timestamp.combine(today, pd.Timestamp('13:00:00').time())
+
+        ax1.axvspan(lunch_start, lunch_end, color='gray', alpha=0.1)
+        ax3.axvspan(lunch_start, lunch_end, color='gray', alpha=0.1)
 
     # 自动调整布局
     plt.tight_layout()
 
-    # 保存图表
-    plt.savefig('kline.png', dpi=100, bbox_inches='tight', facecolor='white')
-    plt.close()
-
-def plot_timeline(code: str, data: pd.DataFrame, save_dir: str = 'charts') -> str:
-    """绘制分时图"""
-    if not os.path.exists(save_dir):
-        os.makedirs(save_dir)
+    # 编码为PNG
+    png = figure_png(fig, options, bbox_inches='tight', facecolor='white')
+    plt.close(fig)
+    return png
 
+def plot_timeline(code: str, data: 'pd.DataFrame', save_dir: str = 'charts',
+                  options: PngOptions = DEFAULT_PNG) -> Optional[str]:
+    """绘制分时图，数据未变化时直接复用已有图片"""
     # 检查数据是否为空
     if data.empty:
         return None
 
+    cache = ChartCache(save_dir)
+    key = ChartCache.key(code, data, 'timeline', (15, 10, options.tag()), (datetime.now().strftime('%Y-%m-%d'),))
+    cached = cache.get(key, 'timeline')
+    if cached:
+        return cached
+
+    with _pyplot_lock:
+        png = render_timeline(code, data, options)
+    return cache.put(key, png, 'timeline') if png else None
+
+def render_timeline(code: str, data: 'pd.DataFrame', options: PngOptions = DEFAULT_PNG) -> Optional[bytes]:
+    """绘制分时图，返回内存中的PNG数据，不写文件；绘制失败返回None"""
+    import pandas as pd
+    import matplotlib.pyplot as plt
+    import matplotlib.dates as mdates
+
     try:
-        # 设置严格的时间范围
-        morning_start = pd.Timestamp(data.index[0].date()).replace(hour=9, minute=30)
-        morning_end = pd.Timestamp(data.index[0].date()).replace(hour=12, minute=0)  # 修改为12:00
-        afternoon_start = pd.Timestamp(data.index[0].date()).replace(hour=13, minute=0)
-        afternoon_end = pd.Timestamp(data.index[0].date()).replace(hour=16, minute=0)  # 修改为16:00
+        # 只对多日分时按LTTB降到几百个点，保留走势形状；单日按原数据绘制
+        days = data.index.normalize().unique()
+        if len(days) > 1:
+            data = downsample_frame(data)
 
         # 设置中文字体
         plt.rcParams['font.sans-serif'] = ['Arial Unicode MS']  # Mac系统使用
@@ -241,19 +308,19 @@ def plot_timeline(code: str, data: pd.DataFrame, save_dir: str = 'charts') -> st
         morning_mask = data.index.hour < 12
         afternoon_mask = data.index.hour >= 12
 
-        # 绘制价格走势（分段绘制）
-        ax1.plot(data[morning_mask].index, data[morning_mask]['price'], 'b-', linewidth=1.5)
-        ax1.plot(data[afternoon_mask].index, data[afternoon_mask]['price'], 'b-', linewidth=1.5)
-
-        # 添加均价线（分段绘制）
+        # 按交易日的上午、下午分段绘制价格走势与均价线，午休与隔夜不连线
+        segments = [segment for _, segment in data.groupby([data.index.normalize(), afternoon_mask])]
+        for segment in segments:
+            ax1.plot(segment.index, segment['price'], 'b-', linewidth=1.5)
         if 'avg_price' in data.columns:
-            ax1.plot(data[morning_mask].index, data[morning_mask]['avg_price'], 'r--', linewidth=1, alpha=0.8)
-            ax1.plot(data[afternoon_mask].index, data[afternoon_mask]['avg_price'], 'r--', linewidth=1, alpha=0.8)
-            ax1.legend(['价格', '均价'], loc='upper left')
+            for segment in segments:
+                ax1.plot(segment.index, segment['avg_price'], 'r--', linewidth=1, alpha=0.8)
+            ax1.legend([ax1.lines[0], ax1.lines[len(segments)]], ['价格', '均价'], loc='upper left')
 
         # 设置价格图样式
         ax1.grid(True, linestyle='--', alpha=0.3)
-        ax1.set_title(f'{code} 分时图 - {datetime.now().strftime("%Y-%m-%d")}', fontsize=12, pad=15)
+        period = f'{days[0]:%Y-%m-%d}~{days[-1]:%Y-%m-%d}' if len(days) > 1 else datetime.now().strftime("%Y-%m-%d")
+        ax1.set_title(f'{code} 分时图 - {period}', fontsize=12, pad=15)
         ax1.set_ylabel('价格(元)', fontsize=10)
 
         # 计算涨跌幅基准线和涨跌幅
@@ -337,65 +404,104 @@ def plot_timeline(code: str, data: pd.DataFrame, save_dir: str = 'charts') -> st
 
         # 设置x轴范围和格式
         for ax in [ax1, ax2]:
-            ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
-            ax.xaxis.set_major_locator(mdates.MinuteLocator(interval=30))
+            if len(days) > 1:
+                ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d %H:%M'))
+                ax.xaxis.set_major_locator(mdates.AutoDateLocator(maxticks=12))
+            else:
+                ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
+                ax.xaxis.set_major_locator(mdates.MinuteLocator(interval=30))
             plt.setp(ax.get_xticklabels(), rotation=45)
 
-            # 添加午休时段的灰色背景
-            ax.axvspan(morning_end, afternoon_start, color='lightgray', alpha=0.3)
+            # 添加每个交易日午休时段(12:00-13:00)的灰色背景
+            for day in days:
+                ax.axvspan(day + pd.Timedelta(hours=12), day + pd.Timedelta(hours=13), color='lightgray', alpha=0.3)
 
         # 自动调整布局
         plt.tight_layout()
 
-        # 保存图表
-        filename = f"{code}_timeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-        filepath = os.path.join(save_dir, filename)
-        plt.savefig(filepath, dpi=100, bbox_inches='tight')
+        # 编码为PNG
+        png = figure_png(fig, options, bbox_inches='tight')
         plt.close(fig)
-
-        return filepath
+        return png
 
     except Exception as e:
         return None
 
-def encode_image_base64(image_path: str) -> str:
-    """将图片转换为Base64编码"""
-    with open(image_path, "rb") as image_file:
+def encode_image_base64(image: Union[str, bytes]) -> str:
+    """将图片转换为Base64编码，image为文件路径或内存中的图片数据"""
+    if isinstance(image, bytes):
+        return base64.b64encode(image).decode('utf-8')
+    with open(image, "rb") as image_file:
         return base64.b64encode(image_file.read()).decode('utf-8')
 
-def query_securities(codes: List[str]):
-    """查询证券信息"""
-    # 检查输入的代码长度
-    if not codes or len(codes[0]) < 4:  # 股票代码至少4位
-        return print(json.dumps({
+def print_kline_base64(code: str, options: PngOptions = PREVIEW_PNG, out=None, ndays: int = 1) -> bool:
+    """绘制K线预览图并把Base64直接写到输出流，不写任何文件；ndays为最近几个交易日的分时"""
+    stock_utils = StockUtils()
+    stock_info = stock_utils.get_stock_info(code)
+    if stock_info.get('error'):
+        return False
+    df = stock_utils.get_timeline_data(code, ndays)
+    if df.empty:
+        return False
+    df['name'] = stock_info['name']
+    out = out or sys.stdout
+    with _pyplot_lock:
+        png = render_kline(code, df, stock_info, options)
+    stream_base64(png, out)
+    out.write('\n')
+    return True
+
+def query_items(codes: List[str]) -> Optional[Dict]:
+    """查询证券信息，返回 Alfred 格式的结果，没有任何结果时返回None"""
+    # 检查输入
+    if not codes:
+        return {
             "items": [{
-                "title": "请输入完整的股票代码",
-                "subtitle": "至少需要4位数字",
+                "title": "请输入股票代码、名称或拼音首字母",
+                "subtitle": "示例: 600519 gzmt 贵州茅台",
                 "valid": False
             }]
-        }))
+        }
+
+    # 输入不是完整代码时，先从本地索引给出候选，不请求行情
+    suggestions = suggestion_items(codes)
+    if suggestions:
+        return {"items": suggestions}
 
     stock_utils = StockUtils()
     fund_utils = FundUtils()
 
+    # 过滤非数字代码后批量获取股票信息
+    codes = [code for code in codes if code.isdigit()]
+    stock_infos = stock_utils.get_stock_infos(codes)
+    stock_codes = [code for code in codes if not stock_infos[code].get('error')]
+
+    # 分时数据与基金信息并发请求，每拿到一只股票的分时就绘图，绘图与其余请求同时进行
+    cache = ChartCache()
+    kline_paths: Dict[str, Optional[str]] = {}
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        fund_futures = {code: executor.submit(fund_utils.get_fund_info, code)
+                        for code in codes if code not in stock_codes}
+        timeline_futures = {executor.submit(stock_utils.get_timeline_data, code): code for code in stock_codes}
+        for future in as_completed(timeline_futures):
+            code = timeline_futures[future]
+            df = future.result()
+            if df.empty:
+                continue
+            stock_info = stock_infos[code]
+            df['name'] = stock_info['name']
+            kline_paths[code] = plot_kline(code, df, stock_info, cache)
+
     results = []
     for code in codes:
-        # 检查代码格式
-        if not code.isdigit():
-            continue
-
         # 尝试获取股票信息
-        stock_info = stock_utils.get_stock_info(code)
-        if stock_info and not stock_info.get('error'):
-            # 获取分时数据
-            df = stock_utils.get_timeline_data(code)
-            if not df.empty:
-                df['name'] = stock_info['name']
-                plot_kline(code, df, stock_info)
+        if code in stock_codes:
+            stock_info = stock_infos[code]
+            kline_path = kline_paths.get(code)
 
             # 构建标题（包含价格和涨跌幅）
             current_price = stock_info.get('price', 0)
-            change_percent = (current_price - stock_info.get('pre_close', 0)) / stock_info.get('pre_close', 1) * 100
+            change_percent = stock_info.get('change_percent', 0)
             title = f"{stock_info['name']} ({code}) {current_price:.3f} {stock_info.get('currency', 'CNY')} {change_percent:+.2f}%"
 
             # 构建副标题信息
@@ -403,7 +509,7 @@ def query_securities(codes: List[str]):
 
             # 添加可选信息
             if 'volume' in stock_info:
-                subtitle_parts.append(f"成交量: {stock_info['volume']:.2f}万股")
+                subtitle_parts.append(f"成交量: {stock_info['volume']:.2f}万手")
             if 'amount' in stock_info:
                 subtitle_parts.append(f"成交额: {stock_info['amount']:.2f}万{stock_info.get('currency', 'CNY')}")
             if 'high' in stock_info:
@@ -415,10 +521,6 @@ def query_securities(codes: List[str]):
             if 'market_value' in stock_info:
                 subtitle_parts.append(f"市值: {stock_info['market_value']:.2f}亿{stock_info.get('currency', 'CNY')}")
 
-            # 获取图片的绝对路径和目录
-            kline_path = os.path.abspath('kline.png')
-            kline_dir = os.path.dirname(kline_path)
-
             # 构建第一个结果项（股票信息）
             results.append({
                 "title": title,
@@ -432,26 +534,27 @@ def query_securities(codes: List[str]):
             })
 
             # 构建第二个结果项（打开图片）
-            results.append({
-                "title": f"{stock_info['name']} ({code}) K线图",
-                "subtitle": "按 Enter 打开图片",
-                "valid": True,
-                "arg": kline_path,
-                "type": "图表",
-                "icon": {
-                    "type": "default"  # 使用默认图标，不显示预览
-                }
-            })
+            if kline_path:
+                results.append({
+                    "title": f"{stock_info['name']} ({code}) K线图",
+                    "subtitle": "按 Enter 打开图片",
+                    "valid": True,
+                    "arg": kline_path,
+                    "type": "图表",
+                    "icon": {
+                        "type": "default"  # 使用默认图标，不显示预览
+                    }
+                })
             continue
 
         # 尝试获取基金信息
-        fund_info = fund_utils.get_fund_info(code)
+        fund_info = fund_futures[code].result()
         if fund_info and not fund_info.get('error'):
             # 构建标题（包含价格和涨跌幅）
-            title = f"{fund_info['name']} ({code}) {fund_info['price']:.3f} {fund_info['change']:+.2f}%"
+            title = f"{fund_info['name']} ({code}) {fund_info['price']:.3f} {fund_info['change_percent']:+.2f}%"
 
             # 构建副标题
-            subtitle = f"溢价: {fund_info['premium']:+.2f}% 估值: {fund_info['estimate']:.4f} 换手: {fund_info['turnover']:.2f}%"
+            subtitle = f"溢价: {fund_info['premium_rate']:+.2f}% 估值: {fund_info['nav']:.4f} 换手: {fund_info['turnover_rate']:.2f}%"
 
             result = {
                 "title": title,
@@ -463,9 +566,13 @@ def query_securities(codes: List[str]):
             results.append(result)
             continue
 
-    # 只输出 Alfred 需要的 JSON 格式
-    if results:
-        print(json.dumps({"items": results}, ensure_ascii=False))
+    return {"items": results} if results else None
+
+def query_securities(codes: List[str]):
+    """查询证券信息，只输出 Alfred 需要的 JSON 格式"""
+    response = query_items(codes)
+    if response:
+        print(json.dumps(response, ensure_ascii=False))
 
 def open_file(filepath: str) -> None:
     """跨平台打开文件"""
@@ -486,6 +593,24 @@ def main():
     if len(sys.argv) < 2:
         print("使用方法: python stock_query.py <代码1> [代码2] [代码3] ...")
         print("示例: python stock_query.py 501311 600519 159949")
+        print("       python stock_query.py --base64 [--days N] 600519  # 输出最近N(1-5)个交易日K线预览图的Base64")
+        return
+
+    if sys.argv[1] == '--base64':
+        codes = sys.argv[2:]
+        ndays = 1
+        if codes[:1] == ['--days'] and len(codes) > 1 and codes[1].isdigit():
+            ndays = min(max(int(codes[1]), 1), MAX_TIMELINE_DAYS)
+            codes = codes[2:]
+        for code in codes:
+            if not print_kline_base64(code, ndays=ndays):
+                print(f"获取{code}的分时数据失败", file=sys.stderr)
+        return
+
+    # 常驻查询服务运行时直接转发，否则在本进程内查询
+    output = forward('stock_query', sys.argv[1:])
+    if output is not None:
+        sys.stdout.write(output)
         return
 
     query_securities(sys.argv[1:])
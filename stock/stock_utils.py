@@ -1,16 +1,44 @@
-import requests
+from http_client import get_http_client
+from quote_cache import get_quote_cache
+from kline_store import KlineStore
+from symbol_master import get_symbol_master
+from fund_cache import FundDailyCache
+from quote_stream import QuoteSubscription, DEFAULT_FIELDS
+from field_registry import LIST_FIELDS, QUOTE_NAMES, STOCK_GET_FIELDS
+from quote import Quote, QuoteFrame
+from watchlist_store import WatchlistStore
+import io
 import json
-from typing import Dict, Union, Tuple
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Union, Tuple
 import time
-import pandas as pd
 from datetime import datetime, timedelta
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+# 分时接口最多返回的交易日数
+MAX_TIMELINE_DAYS = 5
+# 港股每日分时点数上限（09:30-12:00、13:00-16:00及收市竞价），原先固定240会截掉下午的数据
+HK_TIMELINE_POINTS = 340
+
 
 class StockUtils:
-    def __init__(self):
+    def __init__(self, use_watchlist: bool = True):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        # 与其他工具类共享连接池
+        self.http = get_http_client()
+        # 跨进程共享的行情缓存
+        self.cache = get_quote_cache()
+        # 本地K线存储，只增量拉取新K线
+        self.kline_store = KlineStore()
+        # 证券码表，统一代码到市场的路由
+        self.symbols = get_symbol_master()
+        # 按净值日缓存的基金净值与元数据，与FundUtils共享
+        self.fund_cache = FundDailyCache(self.cache)
+        # 自选列表预取的行情快照，预取进程本身不读取
+        self.watchlist = WatchlistStore() if use_watchlist else None
 
     def format_hk_code(self, code: str) -> str:
         """格式化港股代码为5位数字"""
@@ -19,21 +47,35 @@ class StockUtils:
         # 补0到5位
         return code.zfill(5)
 
-    def get_stock_info(self, code: str) -> Dict[str, Union[str, float]]:
-        """获取股票信息"""
+    def _resolve_secid(self, code: str) -> Tuple[str, str]:
+        """通过证券码表确定市场及secid，无法识别时返回('', '')"""
+        symbol = self.symbols.resolve(code)
+        if symbol is None:
+            return '', ''
+        return symbol['market'], symbol['secid']
+
+    def get_stock_info(self, code: str, fields: Tuple[str, ...] = QUOTE_NAMES) -> Union[Quote, Dict[str, str]]:
+        """获取股票信息，fields为字段注册表中的名称，只请求所需字段；优先读取自选快照，其次TTL内的本地缓存"""
+        snapshot = self.watchlist.quote(code, fields) if self.watchlist else None
+        if snapshot is not None:
+            return Quote.from_dict(snapshot)
+
+        cached = self.cache.get('quote', f'stock:{code}')
+        if cached is not None and all(name in cached for name in fields):
+            return Quote.from_dict(cached)
+
+        result = self._fetch_stock_info(code, fields)
+        if 'error' not in result:
+            self.cache.put('quote', f'stock:{code}', result)
+            return Quote.from_dict(result)
+        return result
+
+    def _fetch_stock_info(self, code: str, fields: Tuple[str, ...]) -> Dict[str, Union[str, float]]:
+        """请求接口获取股票信息"""
         try:
             # 确定市场代码
-            if code.startswith(('6', '688', '50', '51')):
-                market = '1'  # 上证
-                full_code = f'1.{code}'
-            elif code.startswith(('0', '3', '2', '15', '16')):
-                market = '0'  # 深证
-                full_code = f'0.{code}'
-            elif code.startswith(('1', '9')) or len(code) <= 4:  # 港股代码处理
-                market = '116'  # 港股市场代码
-                hk_code = self.format_hk_code(code)
-                full_code = f'116.{hk_code}'
-            else:
+            market, full_code = self._resolve_secid(code)
+            if not market:
                 return {'error': '无效的股票代码'}
             
             # 构建请求URL - 使用港股专用API
@@ -46,45 +88,100 @@ class StockUtils:
                 'ut': 'fa5fd1943c7b386f172d6893dbfba10b',
                 'invt': 2,
                 'fltt': 2,
-                'fields': 'f43,f57,f58,f169,f170,f46,f44,f51,f168,f47,f164,f163,f116,f60,f45,f52,f50,f48,f167,f117,f71,f161,f49,f530,f135,f136,f137,f138,f139,f141,f142,f144,f145,f147,f148,f140,f143,f146,f149,f55,f62,f162,f92,f173,f104,f105,f84,f85,f183,f184,f185,f186,f187,f188,f189,f190,f191,f192,f107,f111,f86,f177,f78,f110,f262,f263,f264,f267,f268,f250,f251,f252,f253,f254,f255,f256,f257,f258,f266,f269,f270,f271,f273,f274,f275,f127,f199,f128,f193,f196,f194,f195,f197,f80,f280,f281,f282,f284,f285,f286,f287,f292',
+                'fields': STOCK_GET_FIELDS.keys(fields),
                 'secid': full_code,
                 'forcect': 1
             }
             
             if market == '116':
-                params.update({
-                    'fields': 'f43,f57,f58,f169,f170,f46,f44,f51,f168,f47,f164,f163,f116,f60,f45,f52,f50,f48,f167,f117,f71,f161,f49,f530,f135,f136,f137,f138,f139,f141,f142,f144,f145,f147,f148,f140,f143,f146,f149,f55,f62,f162,f92,f173,f104,f105,f84,f85,f183,f184,f185,f186,f187,f188,f189,f190,f191,f192,f107,f111,f86,f177,f78,f110,f262,f263,f264,f267,f268,f250,f251,f252,f253,f254,f255,f256,f257,f258,f266,f269,f270,f271,f273,f274,f275,f127,f199,f128,f193,f196,f194,f195,f197,f80,f280,f281,f282,f284,f285,f286,f287,f292,f295,f296,f297',
-                    'iscca': '1'
-                })
+                params['iscca'] = '1'
             
-            response = requests.get(url, params=params, headers=self.headers)
+            response = self.http.get(url, params=params, headers=self.headers)
             data = response.json()
             
-            if 'data' not in data:
+            if not data.get('data'):
                 return {'error': '获取数据失败'}
             
-            stock_data = data['data']
-            
-            # 解析数据
-            result = {
-                'code': code,
-                'name': stock_data.get('f58', ''),  # 股票名称
-                'price': float(stock_data.get('f43', 0)),  # 当前价格
-                'pre_close': float(stock_data.get('f60', 0)),  # 昨收价
-                'high': float(stock_data.get('f44', 0)),  # 最高
-                'low': float(stock_data.get('f45', 0)),  # 最低
-                'volume': float(stock_data.get('f47', 0)) / 10000,  # 成交量(手)
-                'amount': float(stock_data.get('f48', 0)) / 10000,  # 成交额(万元)
-                'turnover_rate': float(stock_data.get('f168', 0)),  # 换手率
-                'market_value': float(stock_data.get('f116', 0)) / 100000000,  # 总市值(亿)
-                'currency': 'HKD' if market == '116' else 'CNY'
-            }
-            
+            # 按字段注册表换算单位
+            result = {'code': code}
+            result.update(STOCK_GET_FIELDS.parse(data['data'], fields))
+            result['currency'] = 'HKD' if market == '116' else 'CNY'
             return result
             
         except Exception:
             return {'error': '获取数据失败'}
 
+    def get_stock_infos(self, codes: List[str], fields: Tuple[str, ...] = QUOTE_NAMES) -> QuoteFrame:
+        """批量获取股票信息，一次请求返回所有代码；结果按列存储，按代码访问与get_stock_info结构一致"""
+        results = self.watchlist.quotes(codes, fields) if self.watchlist else {}
+        cached = self.cache.get_many('quote', [f'stock:{code}' for code in codes if code not in results])
+        results.update({
+            code: cached[f'stock:{code}'] for code in codes
+            if f'stock:{code}' in cached and all(name in cached[f'stock:{code}'] for name in fields)
+        })
+        fetched = set()
+        secids = {}
+        for code in codes:
+            if code in results:
+                continue
+            market, full_code = self._resolve_secid(code)
+            if market:
+                secids[full_code] = (code, market)
+            else:
+                results[code] = {'error': '无效的股票代码'}
+
+        if secids:
+            try:
+                url = 'http://push2.eastmoney.com/api/qt/ulist.np/get'
+                params = {
+                    'ut': 'fa5fd1943c7b386f172d6893dbfba10b',
+                    'invt': 2,
+                    'fltt': 2,
+                    'np': 1,
+                    'fields': LIST_FIELDS.keys(('code', 'market') + tuple(fields)),
+                    'secids': ','.join(secids)
+                }
+
+                response = self.http.get(url, params=params, headers=self.headers)
+                data = response.json()
+
+                diff = (data.get('data') or {}).get('diff') or []
+                if isinstance(diff, dict):  # np=0时diff为以序号为键的字典
+                    diff = list(diff.values())
+
+                for stock_data in diff:
+                    secid = f"{stock_data.get('f13')}.{stock_data.get('f12')}"
+                    if secid not in secids:
+                        continue
+                    code, market = secids[secid]
+                    result = {'code': code}
+                    result.update(LIST_FIELDS.parse(stock_data, fields))
+                    result['currency'] = 'HKD' if market == '116' else 'CNY'
+                    results[code] = result
+                    fetched.add(code)
+            except Exception:
+                pass
+
+            self.cache.put_many('quote', {f'stock:{code}': results[code] for code in fetched})
+
+        # 保持输入顺序，未返回的代码标记为失败
+        return QuoteFrame.from_records(list(dict.fromkeys(codes)), results, fields)
+
+    def subscribe(self, codes: List[str], fields: Optional[List[str]] = None,
+                  callback: Optional[Callable[[str, Dict], None]] = None, **kwargs) -> QuoteSubscription:
+        """订阅实时行情，fields为字段注册表中的名称，callback(代码, 变化字段)只收到发生变化的字段，返回的订阅对象调用stop()结束"""
+        secids = {}
+        for code in codes:
+            market, full_code = self._resolve_secid(code)
+            if market:
+                secids[full_code] = code
+            else:
+                print(f"无法确定{code}的市场代码，已忽略")
+        return QuoteSubscription(
+            secids, fields or DEFAULT_FIELDS, callback or (lambda code, delta: None),
+            http=self.http, headers=self.headers, **kwargs
+        ).start()
+
     def get_fund_premium(self, fund_code: str) -> Dict[str, Union[str, float]]:
         """获取场内基金溢价率"""
         try:
@@ -93,16 +190,19 @@ class StockUtils:
             if 'error' in fund_info:
                 return fund_info
 
-            # 获取基金净值
-            url = f'http://fundgz.1234567.com.cn/js/{fund_code}.js'
-            response = requests.get(url, headers=self.headers)
+            # 获取基金净值：官方净值每个净值日只变一次，优先读取缓存
+            nav = self.fund_cache.get(fund_code).get('dwjz')
+            if nav is None:
+                url = f'http://fundgz.1234567.com.cn/js/{fund_code}.js'
+                response = self.http.get(url, headers=self.headers)
 
-            # 解析JSONP格式数据
-            data_text = response.text
-            json_data = json.loads(data_text[8:-2])
+                # 解析JSONP格式数据
+                data_text = response.text
+                json_data = json.loads(data_text[8:-2])
+                self.fund_cache.update_from_fundgz(fund_code, json_data)
 
-            nav = float(json_data['dwjz'])  # 单位净值
-            current_price = fund_info['price']  * 1000 # 已经是正确的元单位
+                nav = float(json_data['dwjz'])  # 单位净值
+            current_price = fund_info['price']
 
             # 计算溢价率
             premium_rate = (current_price - nav) / nav * 100
@@ -111,47 +211,70 @@ class StockUtils:
                 'code': fund_code,
                 'name': fund_info['name'],  # 添加基金名称
                 'price': current_price,
-                'change_percent': fund_info['change_percent'] * 100,
+                'change_percent': fund_info['change_percent'],
                 'nav': nav,
                 'premium_rate': round(premium_rate, 2)
             }
         except Exception as e:
             return {'error': f'获取基金数据失败: {str(e)}'}
 
-    def get_kline_data(self, code: str, days: int = 60) -> pd.DataFrame:
-        """获取股票K线数据"""
-        try:
-            # 确定市场代码
-            if code.startswith(('6', '688', '50', '51')):  # 上证股票、科创板、上证基金
-                market = '1'  # 上证
-                full_code = f'1.{code}'
-            elif code.startswith(('0', '3', '2', '15', '16')):  # 深证股票、创业板、深证基金
-                market = '0'  # 深证
-                full_code = f'0.{code}'
-            else:
-                print(f"无法确定{code}的市场代码")
-                return None
+    def get_kline_data(self, code: str, days: int = 60) -> 'pd.DataFrame':
+        """获取股票K线数据，本地已存储的部分只增量拉取新K线"""
+        import pandas as pd
 
-            # 计算起始时间
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days)
-            
-            # 构建请求URL - 使用新的API
-            url = 'http://83.push2his.eastmoney.com/api/qt/stock/kline/get'
-            params = {
-                'secid': full_code,
-                'fields1': 'f1,f2,f3,f4,f5,f6',
-                'fields2': 'f51,f52,f53,f54,f55,f56,f57,f58,f59,f60,f61',
-                'klt': '101',  # 日K线
-                'fqt': '1',    # 前复权
-                'beg': start_date.strftime('%Y%m%d'),
-                'end': end_date.strftime('%Y%m%d'),
-                'ut': 'fa5fd1943c7b386f172d6893dbfba10b',
-                'rtntype': '6',
-                'forcect': '1'
-            }
+        # 确定市场代码
+        market, full_code = self._resolve_secid(code)
+        if not market:
+            print(f"无法确定{code}的市场代码")
+            return None
+
+        # 计算起始时间
+        end_date = datetime.now()
+        start_date = pd.Timestamp(end_date - timedelta(days=days)).normalize()
+        fqt = '1'  # 前复权
+
+        stored, covered_from = self.kline_store.load(full_code, fqt)
+        if stored is not None and len(stored) >= 2 and covered_from <= start_date:
+            # 从倒数第二根K线开始拉取：最后一根可能是盘中未完成的K线，
+            # 倒数第二根已收盘，可用于校验前复权价格是否因除权而整体变动
+            check_date = stored.index[-2]
+            new = self._fetch_kline_frame(code, full_code, fqt, check_date, end_date)
+            if new is None:
+                return stored[stored.index >= start_date]
 
-            response = requests.get(url, params=params, headers=self.headers)
+            if check_date in new.index and abs(new.at[check_date, 'Close'] - stored.at[check_date, 'Close']) < 1e-6:
+                merged = pd.concat([stored[stored.index < new.index[0]], new])
+                self.kline_store.save(full_code, fqt, merged, covered_from)
+                return merged[merged.index >= start_date]
+
+        # 本地无数据、覆盖范围不足或发生除权时重新拉取完整区间
+        df = self._fetch_kline_frame(code, full_code, fqt, start_date, end_date)
+        if df is not None and not df.empty:
+            self.kline_store.save(full_code, fqt, df, start_date)
+        return df
+
+    def _fetch_kline_frame(self, code: str, full_code: str, fqt: str,
+                           start_date: datetime, end_date: datetime) -> 'pd.DataFrame':
+        """请求[start_date, end_date]区间的日K线"""
+        import pandas as pd
+
+        # 构建请求URL - 使用新的API
+        url = 'http://83.push2his.eastmoney.com/api/qt/stock/kline/get'
+        params = {
+            'secid': full_code,
+            'fields1': 'f1,f2,f3,f4,f5,f6',
+            'fields2': 'f51,f52,f53,f54,f55,f56,f57,f58,f59,f60,f61',
+            'klt': '101',  # 日K线
+            'fqt': fqt,
+            'beg': start_date.strftime('%Y%m%d'),
+            'end': end_date.strftime('%Y%m%d'),
+            'ut': 'fa5fd1943c7b386f172d6893dbfba10b',
+            'rtntype': '6',
+            'forcect': '1'
+        }
+
+        try:
+            response = self.http.get(url, params=params, headers=self.headers)
             
             if response.status_code != 200:
                 print(f"请求失败，状态码: {response.status_code}")
@@ -163,27 +286,10 @@ class StockUtils:
                 print(f"未获取到{code}的K线数据，API返回: {data}")
                 return None
 
-            # 解析K线数据
-            klines = data['data']['klines']
-            dates, opens, highs, lows, closes, volumes = [], [], [], [], [], []
-            
-            for kline in klines:
-                date_str, o, h, l, c, v, *_ = kline.split(',')
-                dates.append(pd.to_datetime(date_str))
-                opens.append(float(o))
-                highs.append(float(h))
-                lows.append(float(l))
-                closes.append(float(c))
-                volumes.append(float(v))
-
-            # 创建DataFrame
-            df = pd.DataFrame({
-                'Open': opens,
-                'High': highs,
-                'Low': lows,
-                'Close': closes,
-                'Volume': volumes
-            }, index=dates)
+            # 解析K线数据：整体一次性解析，日期列只调用一次to_datetime
+            raw = self._parse_rows(data['data']['klines'], 11, {0: 'date', 1: 'Open', 2: 'High', 3: 'Low', 4: 'Close', 5: 'Volume'})
+            df = raw[['Open', 'High', 'Low', 'Close', 'Volume']].astype('float64')
+            df.index = pd.to_datetime(raw['date'].to_numpy())
 
             return df
 
@@ -193,21 +299,34 @@ class StockUtils:
             print(f"请求参数: {params}")
             return None
 
-    def get_timeline_data(self, code: str) -> pd.DataFrame:
-        """获取股票分时数据"""
+    @staticmethod
+    def _parse_rows(rows: List[str], width: int, columns: Dict[int, str]) -> 'pd.DataFrame':
+        """将接口返回的逗号分隔字符串批量解析为字符串列，字段数超过width的行被跳过"""
+        import pandas as pd
+
+        if not rows:
+            return pd.DataFrame(columns=list(columns.values()), dtype=object)
+        df = pd.read_csv(
+            io.StringIO('\n'.join(rows)), header=None, names=range(width), usecols=list(columns),
+            dtype=str, keep_default_na=False, on_bad_lines='skip'
+        )
+        return df.rename(columns=columns).reset_index(drop=True)
+
+    def get_timeline_data(self, code: str, ndays: int = 1) -> 'pd.DataFrame':
+        """获取股票分时数据，ndays为最近1-5个交易日；单日分时在自选快照有效时直接读取"""
+        import pandas as pd
+
+        if not 1 <= ndays <= MAX_TIMELINE_DAYS:
+            raise ValueError(f'ndays应在1到{MAX_TIMELINE_DAYS}之间: {ndays}')
+
+        snapshot = self.watchlist.timeline(code) if self.watchlist and ndays == 1 else None
+        if snapshot is not None:
+            return snapshot
+
         try:
             # 确定市场代码
-            if code.startswith(('6', '688', '50', '51')):
-                market = '1'
-                full_code = f'1.{code}'
-            elif code.startswith(('0', '3', '2', '15', '16')):
-                market = '0'
-                full_code = f'0.{code}'
-            elif len(code) <= 5 and code.isdigit():  # 港股
-                market = '116'
-                code = self.format_hk_code(code)
-                full_code = f'{market}.{code}'
-            else:
+            market, full_code = self._resolve_secid(code)
+            if not market:
                 return pd.DataFrame()
 
             # 构建请求URL和参数
@@ -217,12 +336,12 @@ class StockUtils:
                     'fields1': 'f1,f2,f3,f4,f5,f6,f7,f8,f9,f10,f11',
                     'fields2': 'f51,f52,f53,f54,f55,f56,f57,f58',
                     'ut': 'fa5fd1943c7b386f172d6893dbfba10b',
-                    'ndays': '1',
+                    'ndays': str(ndays),
                     'iscr': '0',
                     'secid': full_code,
                     'forcect': '1',
                     'iscca': '1',
-                    'lmt': '240'
+                    'lmt': str(HK_TIMELINE_POINTS * ndays)
                 }
             else:
                 url = 'http://push2.eastmoney.com/api/qt/stock/trends2/get'
@@ -230,13 +349,13 @@ class StockUtils:
                     'fields1': 'f1,f2,f3,f4,f5,f6,f7,f8,f9,f10,f11',
                     'fields2': 'f51,f52,f53,f54,f55,f56,f57,f58',
                     'ut': 'fa5fd1943c7b386f172d6893dbfba10b',
-                    'ndays': '1',
+                    'ndays': str(ndays),
                     'iscr': '0',
                     'secid': full_code,
                     'forcect': '1'
                 }
             
-            response = requests.get(url, params=params, headers=self.headers)
+            response = self.http.get(url, params=params, headers=self.headers)
             data = response.json()
             
             if 'data' not in data or not data['data']:
@@ -247,49 +366,22 @@ class StockUtils:
             if pre_close == 0:
                 pre_close = float(stock_data.get('f46', 0))
             
-            trends = stock_data.get('trends', [])
-            times, prices, amounts, volumes, avg_prices = [], [], [], [], []
-            
-            for trend in trends:
-                try:
-                    items = trend.split(',')
-                    if len(items) < 7:
-                        continue
-                    
-                    time_str = items[0]
-                    price = float(items[1])
-                    avg_price = float(items[2])
-                    volume = float(items[5])
-                    amount = float(items[6])
-                    
-                    try:
-                        if '-' in time_str:
-                            time = pd.to_datetime(time_str)
-                        else:
-                            time = pd.to_datetime(f"{datetime.now().strftime('%Y-%m-%d')} {time_str}")
-                        
-                        times.append(time)
-                        prices.append(price)
-                        amounts.append(amount)
-                        volumes.append(volume)
-                        avg_prices.append(avg_price)
-                        
-                    except ValueError:
-                        continue
-                    
-                except Exception:
-                    continue
-            
-            if not times:
+            # 整体解析分时数据，无法解析的行直接丢弃
+            raw = self._parse_rows(stock_data.get('trends', []), 8, {0: 'time', 1: 'price', 2: 'avg_price', 5: 'volume', 6: 'amount'})
+            values = raw[['price', 'volume', 'amount', 'avg_price']].apply(pd.to_numeric, errors='coerce')
+
+            # 只有时分的时间补上当天日期
+            time_strs = raw['time']
+            today = datetime.now().strftime('%Y-%m-%d')
+            time_strs = time_strs.where(time_strs.str.contains('-', regex=False), today + ' ' + time_strs)
+            times = pd.to_datetime(time_strs, format='ISO8601', errors='coerce')
+
+            valid = values.notna().all(axis=1) & times.notna()
+            if not valid.any():
                 return pd.DataFrame()
-            
-            df = pd.DataFrame({
-                'price': prices,
-                'volume': volumes,
-                'amount': amounts,
-                'avg_price': avg_prices,
-                'pre_close': pre_close
-            }, index=times)
+
+            df = values[valid].assign(pre_close=pre_close)
+            df.index = pd.DatetimeIndex(times[valid].to_numpy())
             
             df = df[~df.index.duplicated(keep='last')]
             df.sort_index(inplace=True)
@@ -0,0 +1,195 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+from clist import iter_clist
+from quote_cache import cache_dir
+from trading_calendar import trading_date
+
+# clist板块筛选条件 -> 证券类型
+SYMBOL_GROUPS = {
+    'stock': 'm:0+t:6,m:0+t:80,m:1+t:2,m:1+t:23,m:0+t:81+s:2048',  # 沪深京A股
+    'hk': 'm:128+t:3,m:128+t:4,m:128+t:1,m:128+t:2',  # 港股
+    'fund': 'b:MK0021,b:MK0022'  # MK0021是LOF基金，MK0022是ETF基金
+}
+
+RETRY_INTERVAL = 600  # 码表重建失败后的重试间隔（秒）
+
+
+def normalize_code(code: str) -> str:
+    """港股代码补齐为5位，其他代码原样返回"""
+    code = code.strip()
+    if code.isdigit() and len(code) <= 5:
+        return code.zfill(5)
+    return code
+
+
+def guess_symbol(code: str) -> Optional[Dict[str, str]]:
+    """码表缺失时按代码前缀推断市场，无法识别返回None"""
+    code = normalize_code(code)
+    if not code.isdigit():
+        return None
+    if len(code) == 5:
+        market, kind = '116', 'hk'
+    elif len(code) != 6:
+        return None
+    elif code.startswith(('5', '6', '9', '11')):
+        market = '1'  # 上证
+        kind = 'fund' if code.startswith('5') else 'stock'
+    else:
+        market = '0'  # 深证、北证
+        kind = 'fund' if code.startswith(('15', '16', '18')) else 'stock'
+    return {'code': code, 'secid': f'{market}.{code}', 'market': market, 'type': kind, 'name': ''}
+
+
+class SymbolMaster:
+    """本地证券码表：代码 -> secid/市场/类型/名称，每天从clist重建一次"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(cache_dir(), 'symbols.json')
+        self._symbols: Optional[Dict[str, List[str]]] = None
+        self._date = ''
+        self._retry_after = 0.0
+        self._mtime = 0
+        self._lock = threading.Lock()
+
+    def _is_current(self, today: str) -> bool:
+        """已加载的码表是当前交易日构建的，或后台重建尚未完成且码表文件未变化"""
+        if self._symbols is None:
+            return False
+        if self._date == today:
+            return True
+        return self._retry_after > time.time() and self._mtime == self._file_mtime()
+
+    def _file_mtime(self) -> int:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return 0
+
+    def _load(self) -> Dict[str, List[str]]:
+        # 常驻进程跨日后按交易日重新加载，不能只在首次访问时加载
+        today = trading_date()
+        if self._is_current(today):
+            return self._symbols
+        with self._lock:
+            if self._is_current(today):
+                return self._symbols
+
+            cached = {}
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    cached = json.load(f)
+            except (OSError, ValueError):
+                pass
+            self._mtime = self._file_mtime()
+            self._symbols = cached.get('symbols', {})
+            self._date = cached.get('date', '')
+            self._retry_after = cached.get('retry_after', 0)
+
+            if self._date != today and self._retry_after <= time.time():
+                # 重建需分页请求约百次clist，交给后台进程，期间沿用旧码表，未收录的代码按前缀推断
+                self._retry_after = time.time() + RETRY_INTERVAL
+                self._save(dict(cached, symbols=self._symbols, retry_after=self._retry_after))
+                self._mtime = self._file_mtime()
+                self._start_rebuild()
+            return self._symbols
+
+    def _start_rebuild(self):
+        """启动独立的后台进程重建码表，查询进程退出后仍会继续"""
+        try:
+            subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), '--rebuild', '--path', self.path],
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                start_new_session=True
+            )
+        except OSError as e:
+            print(f"启动码表重建失败: {str(e)}", file=sys.stderr)
+
+    def rebuild(self) -> bool:
+        """立即从clist重建码表并写入文件，失败时保留旧码表，等重试间隔过后再由查询触发"""
+        symbols = self._build()
+        if not symbols:
+            return False
+        self._save({'date': trading_date(), 'symbols': symbols})
+        return True
+
+    def _build(self) -> Dict[str, List[str]]:
+        """从clist拉取全部证券，失败返回空字典"""
+        symbols = {}
+        try:
+            for kind, fs in SYMBOL_GROUPS.items():
+                for item in iter_clist(fs, 'f12,f13,f14'):
+                    code = str(item.get('f12', ''))
+                    if code:
+                        symbols[code] = [f"{item.get('f13')}.{code}", kind, item.get('f14', '')]
+        except Exception as e:
+            print(f"构建证券码表失败: {str(e)}")
+            return {}
+        return symbols
+
+    def _save(self, data: Dict):
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+    def lookup(self, code: str) -> Optional[Dict[str, str]]:
+        """查询码表，未收录返回None"""
+        code = normalize_code(code)
+        entry = self._load().get(code)
+        if entry is None:
+            return None
+        secid, kind, name = entry
+        return {'code': code, 'secid': secid, 'market': secid.split('.', 1)[0], 'type': kind, 'name': name}
+
+    def resolve(self, code: str) -> Optional[Dict[str, str]]:
+        """优先查码表，未收录时按前缀推断"""
+        return self.lookup(code) or guess_symbol(code)
+
+    def version(self) -> str:
+        """码表构建日期，供依赖码表的索引判断是否需要重建"""
+        self._load()
+        return self._date
+
+    def symbols(self) -> Dict[str, List[str]]:
+        """全部码表数据：代码 -> [secid, 类型, 名称]"""
+        return self._load()
+
+
+_master: Optional[SymbolMaster] = None
+_master_lock = threading.Lock()
+
+
+def get_symbol_master() -> SymbolMaster:
+    """获取进程内共享的SymbolMaster"""
+    global _master
+    if _master is None:
+        with _master_lock:
+            if _master is None:
+                _master = SymbolMaster()
+    return _master
+
+
+def main():
+    parser = argparse.ArgumentParser(description='证券码表')
+    parser.add_argument('--rebuild', action='store_true', help='从clist重建码表')
+    parser.add_argument('--path', default=None, help='码表文件路径')
+    args = parser.parse_args()
+
+    master = SymbolMaster(args.path)
+    if args.rebuild and not master.rebuild():
+        sys.exit(1)
+    print(f"码表 {master.version()}: {len(master.symbols())} 只证券")
+
+
+if __name__ == "__main__":
+    main()
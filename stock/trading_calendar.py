@@ -0,0 +1,76 @@
+from datetime import date, datetime, time, timedelta
+from typing import Collection, List, Optional, Tuple
+
+
+def trading_date(now: Optional[datetime] = None) -> str:
+    """最近一个交易日（周末回退到周五，节假日未处理），格式YYYY-MM-DD"""
+    day = (now or datetime.now()).date()
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day.strftime('%Y-%m-%d')
+
+
+# 基金官方净值通常在交易日晚间公布，之后才切换到当日净值
+NAV_PUBLISH_HOUR = 21
+
+
+def previous_trading_date(date: str) -> str:
+    """给定日期之前的最近一个交易日"""
+    day = datetime.strptime(date, '%Y-%m-%d') - timedelta(days=1)
+    return trading_date(day)
+
+
+def nav_date(now: Optional[datetime] = None) -> str:
+    """当前应生效的最新官方净值日期：交易日公布时间前为上一交易日，周末沿用周五净值"""
+    now = now or datetime.now()
+    today = now.strftime('%Y-%m-%d')
+    if trading_date(now) != today or now.hour >= NAV_PUBLISH_HOUR:
+        return trading_date(now)
+    return previous_trading_date(today)
+
+
+# 各市场的交易时段（含开盘集合竞价与港股收市竞价），午休与收盘后行情不再变化
+SESSIONS = {
+    'a': ((time(9, 15), time(11, 30)), (time(13, 0), time(15, 0))),
+    'hk': ((time(9, 0), time(12, 0)), (time(13, 0), time(16, 10)))
+}
+
+# 查找前后交易时段时最多跨越的天数（覆盖长假）
+MAX_SEARCH_DAYS = 14
+
+
+def session_kind(market: str) -> str:
+    """secid市场代码对应的交易时段类别：港股为hk，其余按A股"""
+    return 'hk' if market == '116' else 'a'
+
+
+def sessions(day: date, kind: str, closed_days: Collection[str] = ()) -> List[Tuple[datetime, datetime]]:
+    """某日的交易时段列表，周末及closed_days中的日期(YYYY-MM-DD)为空"""
+    if day.weekday() >= 5 or day.strftime('%Y-%m-%d') in closed_days:
+        return []
+    return [(datetime.combine(day, start), datetime.combine(day, end)) for start, end in SESSIONS[kind]]
+
+
+def in_session(now: datetime, kind: str, closed_days: Collection[str] = ()) -> bool:
+    """当前是否处于交易时段"""
+    return any(start <= now < end for start, end in sessions(now.date(), kind, closed_days))
+
+
+def last_session_end(now: datetime, kind: str, closed_days: Collection[str] = ()) -> Optional[datetime]:
+    """最近一个已结束交易时段的结束时间（午休时为上午收盘）"""
+    for offset in range(MAX_SEARCH_DAYS):
+        day = now.date() - timedelta(days=offset)
+        ends = [end for _, end in sessions(day, kind, closed_days) if end <= now]
+        if ends:
+            return max(ends)
+    return None
+
+
+def next_session_start(now: datetime, kind: str, closed_days: Collection[str] = ()) -> Optional[datetime]:
+    """下一个尚未开始的交易时段的开始时间"""
+    for offset in range(MAX_SEARCH_DAYS):
+        day = now.date() + timedelta(days=offset)
+        starts = [start for start, _ in sessions(day, kind, closed_days) if start > now]
+        if starts:
+            return min(starts)
+    return None
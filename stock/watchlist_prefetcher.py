@@ -0,0 +1,176 @@
+"""自选列表后台预取：按交易时段自适应刷新报价与分时快照，查询脚本优先读取快照
+
+交易时段内报价每 quote_interval 秒、分时每 timeline_interval 秒刷新；午休、收盘后各补取一次收盘数据，
+之后休眠到下一个交易时段；开盘一段时间后所有自选证券都没有当日成交，视为节假日休市
+
+用法: python watchlist_prefetcher.py [--codes 600519,00700] [--once]
+"""
+import argparse
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from field_registry import LIST_FIELDS
+from stock_utils import StockUtils
+from trading_calendar import SESSIONS, in_session, last_session_end, next_session_start, sessions, session_kind
+from watchlist_store import WatchlistStore, load_watchlist, watchlist_path
+
+QUOTE_INTERVAL = 5
+TIMELINE_INTERVAL = 60
+# 收盘后等待收盘竞价结果落定再补取
+CLOSE_SETTLE = 30
+# 开盘后多久仍无当日成交则判定为休市
+HOLIDAY_GRACE = 1800
+# 非交易时段最长休眠，便于重新读取自选列表
+MAX_IDLE = 600
+
+# 预取全部列表字段，查询时按需投影
+PREFETCH_FIELDS = tuple(name for name in LIST_FIELDS.fields if name not in ('code', 'market'))
+
+
+class WatchlistPrefetcher:
+    """按市场(A股/港股)分组维护上次刷新时间，计算下次刷新时刻并写入WatchlistStore"""
+
+    def __init__(self, codes: List[str], store: Optional[WatchlistStore] = None,
+                 stock_utils: Optional[StockUtils] = None, quote_interval: float = QUOTE_INTERVAL,
+                 timeline_interval: float = TIMELINE_INTERVAL, max_workers: int = 4):
+        self.store = store or WatchlistStore()
+        self.stock_utils = stock_utils or StockUtils(use_watchlist=False)
+        self.quote_interval = quote_interval
+        self.timeline_interval = timeline_interval
+        self.max_workers = max_workers
+        self._stop = threading.Event()
+        self.set_codes(codes)
+
+    def set_codes(self, codes: List[str]):
+        """更新自选列表，无法识别市场的代码忽略"""
+        self.kinds: Dict[str, str] = {}
+        for code in codes:
+            symbol = self.stock_utils.symbols.resolve(code)
+            if symbol:
+                self.kinds[code] = session_kind(symbol['market'])
+        self.last_quote = {kind: 0.0 for kind in SESSIONS}
+        self.last_timeline = {kind: 0.0 for kind in SESSIONS}
+        self.store.prune(self.kinds)
+
+    def codes_of(self, kind: str) -> List[str]:
+        return [code for code, code_kind in self.kinds.items() if code_kind == kind]
+
+    def due(self, kind: str, now: float) -> Dict[str, bool]:
+        """该市场的报价、分时是否需要刷新"""
+        moment = datetime.fromtimestamp(now)
+        closed = self.store.closed_days(kind)
+        if in_session(moment, kind, closed):
+            return {
+                'quote': now - self.last_quote[kind] >= self.quote_interval,
+                'timeline': now - self.last_timeline[kind] >= self.timeline_interval
+            }
+        # 午休或收盘后补取一次，此后直到下个时段都不再请求
+        end = last_session_end(moment, kind, closed)
+        settled = end is not None and now >= end.timestamp() + CLOSE_SETTLE
+        final = settled and self.last_quote[kind] < end.timestamp() + CLOSE_SETTLE
+        return {'quote': final, 'timeline': final}
+
+    def next_wakeup(self, now: float) -> float:
+        """距下次需要刷新的秒数"""
+        moment = datetime.fromtimestamp(now)
+        waits = [MAX_IDLE]
+        for kind in set(self.kinds.values()):
+            closed = self.store.closed_days(kind)
+            if in_session(moment, kind, closed):
+                waits.append(self.last_quote[kind] + self.quote_interval - now)
+                waits.append(self.last_timeline[kind] + self.timeline_interval - now)
+                continue
+            end = last_session_end(moment, kind, closed)
+            if end is not None and self.last_quote[kind] < end.timestamp() + CLOSE_SETTLE:
+                waits.append(end.timestamp() + CLOSE_SETTLE - now)
+            start = next_session_start(moment, kind, closed)
+            if start is not None:
+                waits.append(start.timestamp() - now)
+        return max(min(waits), 0.5)
+
+    def refresh_quotes(self, kind: str, now: float):
+        codes = self.codes_of(kind)
+        frame = self.stock_utils.get_stock_infos(codes, PREFETCH_FIELDS)
+        records = {code: dict(frame[code]) for code in codes if 'error' not in frame[code]}
+        if records:
+            self.store.put_quotes(records, self.kinds, now, keep=self.kinds)
+        self.last_quote[kind] = now
+        self.check_closed(kind, now, records)
+
+    def refresh_timelines(self, kind: str, now: float):
+        def fetch(code):
+            df = self.stock_utils.get_timeline_data(code)
+            if not df.empty:
+                self.store.put_timeline(code, kind, df, now)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(fetch, self.codes_of(kind)))
+        self.last_timeline[kind] = now
+
+    def check_closed(self, kind: str, now: float, records: Dict[str, Dict]):
+        """交易时段开始HOLIDAY_GRACE秒后，所有自选证券的最新行情仍早于今日开盘，记为休市日"""
+        moment = datetime.fromtimestamp(now)
+        today = sessions(moment.date(), kind)
+        if not records or not today or not in_session(moment, kind):
+            return
+        first_open = today[0][0].timestamp()
+        latest = max(record.get('updated_at', 0) for record in records.values())
+        if now >= first_open + HOLIDAY_GRACE and latest < first_open:
+            self.store.mark_closed(kind, moment.strftime('%Y-%m-%d'))
+            print(f"{kind} {moment:%Y-%m-%d} 无当日成交，按休市处理", file=sys.stderr)
+
+    def run_once(self, now: Optional[float] = None, force: bool = False):
+        """执行一轮到期的刷新，force时忽略时段全部刷新"""
+        now = now or time.time()
+        for kind in set(self.kinds.values()):
+            due = {'quote': True, 'timeline': True} if force else self.due(kind, now)
+            try:
+                if due['quote']:
+                    self.refresh_quotes(kind, now)
+                if due['timeline']:
+                    self.refresh_timelines(kind, now)
+            except Exception as e:
+                print(f"刷新{kind}自选快照失败: {str(e)}", file=sys.stderr)
+
+    def run(self, reload_path: Optional[str] = None):
+        """循环刷新直到stop；给出reload_path时每轮重新读取自选列表"""
+        while not self._stop.is_set():
+            if reload_path:
+                codes = load_watchlist(reload_path)
+                if set(codes) != set(self.kinds):
+                    self.set_codes(codes)
+            self.run_once()
+            self._stop.wait(self.next_wakeup(time.time()))
+
+    def stop(self):
+        self._stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='自选列表后台预取')
+    parser.add_argument('--codes', default=None, help='逗号分隔的代码，默认读取自选列表文件')
+    parser.add_argument('--once', action='store_true', help='忽略交易时段立即刷新一次后退出')
+    args = parser.parse_args()
+
+    path = None if args.codes else watchlist_path()
+    codes = [code for code in args.codes.split(',') if code] if args.codes else load_watchlist(path)
+    if not codes:
+        print(f"自选列表为空，请在 {watchlist_path()} 中每行填写一个代码，或使用 --codes", file=sys.stderr)
+        sys.exit(1)
+
+    prefetcher = WatchlistPrefetcher(codes)
+    if args.once:
+        prefetcher.run_once(force=True)
+        return
+    try:
+        prefetcher.run(reload_path=path)
+    except KeyboardInterrupt:
+        prefetcher.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+from quote_cache import cache_dir
+from trading_calendar import in_session, last_session_end
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# 交易时段内快照的最长有效期（秒），超过说明预取进程已停止，回退到实时请求
+QUOTE_MAX_AGE = 30
+TIMELINE_MAX_AGE = 150
+
+TIMELINE_COLUMNS = ('price', 'volume', 'amount', 'avg_price')
+
+
+def watchlist_path() -> str:
+    """自选列表文件，可通过环境变量 STOCK_WATCHLIST 覆盖"""
+    return os.environ.get('STOCK_WATCHLIST') or os.path.join(cache_dir(), 'watchlist.txt')
+
+
+def load_watchlist(path: Optional[str] = None) -> List[str]:
+    """读取自选列表：代码以空白或逗号分隔，#之后为注释"""
+    try:
+        with open(path or watchlist_path(), encoding='utf-8') as f:
+            lines = [line.split('#', 1)[0] for line in f]
+    except OSError:
+        return []
+    return list(dict.fromkeys(code for line in lines for code in re.split(r'[\s,]+', line) if code))
+
+
+class WatchlistStore:
+    """自选列表的本地行情快照：报价存一个JSON文件，分时每只证券一个.npz文件；
+    由预取进程写入，查询时在有效期内优先读取"""
+
+    def __init__(self, path: Optional[str] = None, quote_max_age: float = QUOTE_MAX_AGE,
+                 timeline_max_age: float = TIMELINE_MAX_AGE):
+        self.path = path or os.path.join(cache_dir(), 'watchlist')
+        self.quote_max_age = quote_max_age
+        self.timeline_max_age = timeline_max_age
+        os.makedirs(self.path, exist_ok=True)
+        self._lock = threading.Lock()
+        # 按文件修改时间缓存解析结果，常驻进程中重复查询不必重新读取
+        self._snapshot: Dict = {}
+        self._mtime: Optional[int] = None
+
+    @property
+    def quotes_file(self) -> str:
+        return os.path.join(self.path, 'quotes.json')
+
+    def _timeline_file(self, code: str) -> str:
+        return os.path.join(self.path, f'timeline_{code}.npz')
+
+    def _load(self) -> Dict:
+        try:
+            mtime = os.stat(self.quotes_file).st_mtime_ns
+        except OSError:
+            return {}
+        with self._lock:
+            if mtime != self._mtime:
+                try:
+                    with open(self.quotes_file, encoding='utf-8') as f:
+                        self._snapshot = json.load(f)
+                except (OSError, ValueError):
+                    self._snapshot = {}
+                self._mtime = mtime
+            return self._snapshot
+
+    def _write(self, snapshot: Dict):
+        tmp = f'{self.quotes_file}.{os.getpid()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp, self.quotes_file)
+
+    def closed_days(self, kind: str) -> List[str]:
+        """预取时发现未开市的日期（节假日），交易时段计算时排除"""
+        return self._load().get('closed_days', {}).get(kind, [])
+
+    def is_fresh(self, kind: str, fetched_at: float, max_age: float, now: Optional[float] = None) -> bool:
+        """交易时段内要求在max_age内更新；非交易时段要求在最近一次收盘(或午休)前后max_age内及之后更新"""
+        now = now or time.time()
+        moment = datetime.fromtimestamp(now)
+        closed = self.closed_days(kind)
+        if in_session(moment, kind, closed):
+            return now - fetched_at <= max_age
+        end = last_session_end(moment, kind, closed)
+        return end is None or fetched_at >= end.timestamp() - max_age
+
+    def quotes(self, codes: Iterable[str], fields: Iterable[str]) -> Dict[str, Dict]:
+        """快照中仍有效且包含全部所需字段的报价"""
+        entries = self._load().get('quotes', {})
+        fields = tuple(fields)
+        now = time.time()
+        results = {}
+        for code in codes:
+            entry = entries.get(code)
+            if (entry and all(name in entry['data'] for name in fields)
+                    and self.is_fresh(entry['kind'], entry['fetched_at'], self.quote_max_age, now)):
+                results[code] = entry['data']
+        return results
+
+    def quote(self, code: str, fields: Iterable[str]) -> Optional[Dict]:
+        return self.quotes([code], fields).get(code)
+
+    def put_quotes(self, records: Dict[str, Dict], kinds: Dict[str, str], fetched_at: float,
+                   keep: Optional[Iterable[str]] = None):
+        """写入报价，keep给出时删除不在其中的代码（已移出自选列表）"""
+        snapshot = dict(self._load())
+        entries = dict(snapshot.get('quotes', {}))
+        if keep is not None:
+            keep = set(keep)
+            entries = {code: entry for code, entry in entries.items() if code in keep}
+        for code, data in records.items():
+            entries[code] = {'kind': kinds[code], 'fetched_at': fetched_at, 'data': data}
+        snapshot['quotes'] = entries
+        self._write(snapshot)
+
+    def mark_closed(self, kind: str, day: str):
+        """记录某市场某日未开市，只保留最近的若干天"""
+        snapshot = dict(self._load())
+        closed = dict(snapshot.get('closed_days', {}))
+        closed[kind] = sorted(set(closed.get(kind, [])) | {day})[-30:]
+        snapshot['closed_days'] = closed
+        self._write(snapshot)
+
+    def timeline(self, code: str) -> Optional['pd.DataFrame']:
+        """快照中仍有效的分时数据，与StockUtils.get_timeline_data结构一致"""
+        import numpy as np
+        import pandas as pd
+
+        try:
+            with np.load(self._timeline_file(code)) as data:
+                if not self.is_fresh(str(data['kind']), float(data['fetched_at']), self.timeline_max_age):
+                    return None
+                df = pd.DataFrame({column: data[column] for column in TIMELINE_COLUMNS},
+                                  index=pd.DatetimeIndex(data['time'].astype('datetime64[ns]')))
+                return df.assign(pre_close=float(data['pre_close']))
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def put_timeline(self, code: str, kind: str, df: 'pd.DataFrame', fetched_at: float):
+        """原子写入分时数据"""
+        import numpy as np
+
+        target = self._timeline_file(code)
+        tmp = f'{target}.{os.getpid()}.tmp.npz'
+        np.savez(
+            tmp,
+            time=df.index.values.astype('datetime64[s]'),
+            pre_close=float(df['pre_close'].iloc[0]),
+            kind=kind,
+            fetched_at=fetched_at,
+            **{column: df[column].to_numpy(dtype='float64') for column in TIMELINE_COLUMNS}
+        )
+        os.replace(tmp, target)
+
+    def prune(self, keep: Iterable[str]):
+        """删除已移出自选列表的分时文件"""
+        keep = {f'timeline_{code}.npz' for code in keep}
+        for name in os.listdir(self.path):
+            if name.startswith('timeline_') and name.endswith('.npz') and name not in keep:
+                try:
+                    os.remove(os.path.join(self.path, name))
+                except OSError:
+                    pass
@@ -1,5 +1,3 @@
-import akshare as ak
-import pandas as pd
 import requests
 import json
 from datetime import datetime